@@ -0,0 +1,52 @@
+"""Leader election across API worker processes (SQLite lease)"""
+
+import asyncio
+import os
+import secrets
+import socket
+from typing import Callable, List
+import metrics
+import models
+
+LEASE_NAME = "background-jobs"
+# Seconds a lease stays valid without renewal; renewed every third of that
+LEASE_TTL = int(os.environ.get("INTROS_LEASE_TTL", "30"))
+
+HOLDER = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+is_leader = False
+
+metrics.Gauge("intros_leader", "1 if this worker runs the background jobs", fn=lambda: int(is_leader))
+
+async def run_as_leader(jobs: List[Callable]):
+    """Keep trying to hold the lease; run the jobs while held, cancel them if lost.
+    Any number of workers can call this, exactly one runs the jobs."""
+    global is_leader
+    tasks = []
+    try:
+        while True:
+            try:
+                held = await asyncio.to_thread(models.acquire_lease, LEASE_NAME, HOLDER, LEASE_TTL)
+            except Exception as e:
+                # Can't prove we still hold it: stop before another worker takes over
+                print(f"Lease renewal error: {e}")
+                held = False
+            if held and not tasks:
+                print(f"Acquired {LEASE_NAME} lease ({HOLDER}), starting background jobs")
+                tasks = [asyncio.create_task(job()) for job in jobs]
+            elif not held and tasks:
+                print(f"Lost {LEASE_NAME} lease, stopping background jobs")
+                for task in tasks:
+                    task.cancel()
+                tasks = []
+            is_leader = held
+            await asyncio.sleep(LEASE_TTL / 3)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def release():
+    """Hand the lease over on shutdown"""
+    global is_leader
+    if is_leader:
+        models.release_lease(LEASE_NAME, HOLDER)
+        is_leader = False
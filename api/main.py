@@ -1,23 +1,56 @@
 """Intros API Server"""
 
-from fastapi import FastAPI, HTTPException, Depends, Header, Request
+from fastapi import FastAPI, HTTPException, Depends, Header, Request, Response
+from fastapi.params import Param
+from fastapi.routing import APIRoute
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from fastapi.responses import HTMLResponse, PlainTextResponse
+from starlette.middleware.gzip import GZipMiddleware
+from pydantic import BaseModel, Field, ValidationError
+from typing import Optional, List, get_args
 import models
+import quota
+import leader
+import metrics
+import querylog
 import asyncio
+import inspect
+import os
+from urllib.parse import parse_qsl
+from ratelimit import RateLimitMiddleware, get_stats as get_rate_limit_stats
 from telegram_verify import start_verify_bot, start_notification_loop
+import web_ui
 from web_ui import router as web_router
 
 app = FastAPI(title="Intros API", version="1.0.0")
 
+# Responses smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.environ.get("INTROS_COMPRESS_MIN_BYTES", "1000"))
+
+# Innermost: compress bodies for clients sending Accept-Encoding (brotli if
+# brotli-asgi is installed, gzip otherwise)
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESS_MIN_BYTES, gzip_fallback=True)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_BYTES)
+# Per-key/per-IP rate limits and global load shedding
+app.add_middleware(RateLimitMiddleware)
+# Outermost, so rejected and shed requests are counted too
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Include web UI routes
 app.include_router(web_router)
 
 # Admin Telegram ID
 ADMIN_TELEGRAM_ID = "1196063372"
 
+# If set, /metrics requires "Authorization: Bearer <token>"
+METRICS_TOKEN = os.environ.get("INTROS_METRICS_TOKEN", "")
+
+# Most sub-requests accepted by one /batch call
+BATCH_MAX = int(os.environ.get("INTROS_BATCH_MAX", "20"))
+
 # === Pydantic Models ===
 
 class RegisterRequest(BaseModel):
@@ -46,6 +79,7 @@ class SearchRequest(BaseModel):
     interests: Optional[str] = None
     looking_for: Optional[str] = None
     location: Optional[str] = None
+    facets: Optional[bool] = False
     limit: Optional[int] = 10
     offset: Optional[int] = 0
 
@@ -53,6 +87,47 @@ class MessageRequest(BaseModel):
     to_bot_id: str
     content: str = Field(..., max_length=500)
 
+class TierRequest(BaseModel):
+    tier: str
+
+# === Response Models ===
+# JSON endpoints declare a return type so FastAPI serializes straight to bytes
+# with pydantic-core instead of jsonable_encoder + json.dumps. Lists use
+# explicit lean schemas; everything else is a plain dict.
+
+class ConnectionCard(BaseModel):
+    bot_id: str
+    name: str
+    interests: Optional[str] = None
+    looking_for: Optional[str] = None
+    location: Optional[str] = None
+    bio: Optional[str] = None
+    telegram_handle: Optional[str] = None
+    connected_at: Optional[str] = None
+
+class ConnectionList(BaseModel):
+    connections: List[ConnectionCard]
+    count: int
+
+class AdminUser(BaseModel):
+    bot_id: str
+    telegram_id: Optional[str] = None
+    verified: int = 0
+    tier: Optional[str] = None
+    created_at: Optional[str] = None
+    name: Optional[str] = None
+    interests: Optional[str] = None
+    looking_for: Optional[str] = None
+    location: Optional[str] = None
+
+class BatchCall(BaseModel):
+    method: str = "GET"
+    path: str
+    body: Optional[dict] = None
+
+class BatchRequest(BaseModel):
+    requests: List[BatchCall]
+
 # === Auth Dependency ===
 # Plain def so FastAPI runs them in a thread pool (sync DB calls)
 
@@ -73,10 +148,21 @@ def get_verified_user(user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Account not verified")
     return user
 
+# === Conditional Requests ===
+
+def _not_modified(response: Response, if_none_match: Optional[str], etag: str) -> Optional[Response]:
+    """Set the ETag header; return a 304 response if the client's copy is current"""
+    response.headers["ETag"] = etag
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if etag in tags or "*" in tags:
+            return Response(status_code=304, headers={"ETag": etag})
+    return None
+
 # === Auth Endpoints ===
 
 @app.post("/register")
-def register(req: RegisterRequest):
+def register(req: RegisterRequest) -> dict:
     """Register a new bot"""
     result = models.create_user(req.bot_id, req.telegram_id, req.openclaw_bot_username)
     if result["success"]:
@@ -89,46 +175,81 @@ def register(req: RegisterRequest):
     raise HTTPException(status_code=400, detail=result["error"])
 
 @app.get("/verify-status")
-def verify_status(user: dict = Depends(get_current_user)):
+def verify_status(user: dict = Depends(get_current_user)) -> dict:
     """Check verification status"""
     return {"verified": user["verified"] == 1}
 
 # === Profile Endpoints ===
 
 @app.post("/profile")
-def create_profile(req: ProfileRequest, user: dict = Depends(get_verified_user)):
+def create_profile(req: ProfileRequest, user: dict = Depends(get_verified_user)) -> dict:
     """Create or update profile"""
     result = models.create_or_update_profile(user["bot_id"], req.dict())
+    web_ui.invalidate_profile_page(user["bot_id"])
     return result
 
 @app.get("/profile/{bot_id}")
-def get_profile(bot_id: str, user: dict = Depends(get_verified_user)):
-    """Get a profile (records visit)"""
-    # Check limits
-    if user["bot_id"] != bot_id and not models.check_limit(user["bot_id"], "profile_views"):
-        limits = models.get_daily_limits(user["bot_id"])
+def get_profile(bot_id: str, response: Response, user: dict = Depends(get_verified_user),
+                if_none_match: Optional[str] = Header(None)) -> dict:
+    """Get a profile (records visit). Honours If-None-Match."""
+    # Consume a view up front (atomic check-and-consume)
+    is_other = user["bot_id"] != bot_id
+    if is_other and not quota.consume(user["bot_id"], "profile_views"):
+        limits = quota.get_limits(user["bot_id"])
         return {"message": "No more profile views left for today. Come back tomorrow!", "limits": limits}
 
-    profile = models.get_profile(bot_id, user["bot_id"] if user["bot_id"] != bot_id else None)
+    version = models.get_user_version(bot_id) if is_other else user["version"]
+    if version is None:
+        quota.refund(user["bot_id"], "profile_views")
+        raise HTTPException(status_code=404, detail="Profile not found")
+    not_modified = _not_modified(response, if_none_match, f'"profile-{version}"')
+    if not_modified:
+        # Still a view: the visit is recorded, only the query and payload are skipped
+        models.record_profile_views(user["bot_id"], [bot_id])
+        return not_modified
+
+    profile = models.get_profile(bot_id, user["bot_id"] if is_other else None)
     if not profile:
+        if is_other:
+            quota.refund(user["bot_id"], "profile_views")
         raise HTTPException(status_code=404, detail="Profile not found")
 
     return profile
 
 @app.get("/profile")
-def get_my_profile(user: dict = Depends(get_verified_user)):
-    """Get own profile"""
+def get_my_profile(response: Response, user: dict = Depends(get_verified_user),
+                   if_none_match: Optional[str] = Header(None)) -> dict:
+    """Get own profile. Honours If-None-Match."""
+    not_modified = _not_modified(response, if_none_match, f'"profile-{user["version"]}"')
+    if not_modified:
+        return not_modified
     profile = models.get_profile(user["bot_id"])
     return profile or {}
 
 # === Search Endpoint ===
 
+def _grant_views(bot_id: str, cards: List[models.ProfileCard]) -> List[dict]:
+    """Skip the viewer's own card, cap by the daily views actually granted
+    (concurrent requests can't overshoot), record the views and serialize,
+    in one pass over the page"""
+    granted = quota.consume(bot_id, "profile_views",
+                            sum(card.bot_id != bot_id for card in cards), partial=True)
+    results, viewed_ids = [], []
+    for card in cards:
+        if len(viewed_ids) >= granted:
+            break
+        if card.bot_id != bot_id:
+            viewed_ids.append(card.bot_id)
+            results.append(card.to_dict())
+    models.record_profile_views(bot_id, viewed_ids)
+    return results
+
 @app.post("/search")
-def search_profiles(req: SearchRequest, user: dict = Depends(get_verified_user)):
+def search_profiles(req: SearchRequest, user: dict = Depends(get_verified_user)) -> dict:
     """Search for profiles by free-text query or filters"""
-    remaining = models.remaining_profile_views(user["bot_id"])
+    remaining = quota.remaining(user["bot_id"], "profile_views")
     if remaining <= 0:
-        limits = models.get_daily_limits(user["bot_id"])
+        limits = quota.get_limits(user["bot_id"])
         return {
             "results": [],
             "count": 0,
@@ -150,37 +271,44 @@ def search_profiles(req: SearchRequest, user: dict = Depends(get_verified_user))
         location=req.location,
         limit=limit,
         offset=offset,
-        viewer_bot_id=user["bot_id"]
+        viewer_bot_id=user["bot_id"],
+        facets=bool(req.facets)
     )
 
-    # Filter out own profile
-    result["results"] = [p for p in result["results"] if p["bot_id"] != user["bot_id"]]
-
-    # Cap by remaining daily views
-    result["results"] = result["results"][:remaining]
-
-    # Record views for all returned profiles
-    viewed_ids = [p["bot_id"] for p in result["results"]]
-    models.record_profile_views(user["bot_id"], viewed_ids)
-
-    limits = models.get_daily_limits(user["bot_id"])
-    return {
-        "results": result["results"],
-        "count": len(result["results"]),
+    results = _grant_views(user["bot_id"], result["results"])
+    limits = quota.get_limits(user["bot_id"])
+    response = {
+        "results": results,
+        "count": len(results),
         "total": result["total"],
         "offset": offset,
         "limit": limit,
-        "has_more": (offset + limit) < result["total"],
+        "has_more": result["has_more"],
         "limits": limits
     }
+    if "corrections" in result:
+        response["corrections"] = result["corrections"]
+    if "facets" in result:
+        response["facets"] = result["facets"]
+    return response
+
+@app.get("/search/suggest")
+def suggest(q: str, limit: int = 10, user: dict = Depends(get_verified_user)) -> dict:
+    """Autocomplete interests, looking_for and location values (free, no daily limit)"""
+    suggestions = models.suggest_terms(q, max(1, min(limit, 25)))
+    return {"suggestions": suggestions, "count": len(suggestions)}
 
 @app.get("/recommend")
 def recommend_profiles(user: dict = Depends(get_verified_user),
-                             limit: int = 10, offset: int = 0):
-    """Get profile recommendations based on your profile"""
-    remaining = models.remaining_profile_views(user["bot_id"])
+                             limit: int = 10, offset: int = 0, mode: str = "profile") -> dict:
+    """Get profile recommendations based on your profile, or on your network
+    (friends of your connections) with mode=network"""
+    if mode not in ("profile", "network"):
+        raise HTTPException(status_code=400, detail="mode must be 'profile' or 'network'")
+
+    remaining = quota.remaining(user["bot_id"], "profile_views")
     if remaining <= 0:
-        limits = models.get_daily_limits(user["bot_id"])
+        limits = quota.get_limits(user["bot_id"])
         return {
             "results": [],
             "count": 0,
@@ -195,30 +323,27 @@ def recommend_profiles(user: dict = Depends(get_verified_user),
     limit = max(1, min(limit, 50))
     offset = max(0, offset)
 
-    result = models.get_recommendations(user["bot_id"], limit, offset)
-
-    # Cap by remaining daily views
-    result["results"] = result["results"][:remaining]
+    if mode == "network":
+        result = models.get_network_recommendations(user["bot_id"], limit, offset)
+    else:
+        result = models.get_recommendations(user["bot_id"], limit, offset)
 
-    # Record views for all returned profiles
-    viewed_ids = [p["bot_id"] for p in result["results"]]
-    models.record_profile_views(user["bot_id"], viewed_ids)
-
-    limits = models.get_daily_limits(user["bot_id"])
+    results = _grant_views(user["bot_id"], result["results"])
+    limits = quota.get_limits(user["bot_id"])
     return {
-        "results": result["results"],
-        "count": len(result["results"]),
+        "results": results,
+        "count": len(results),
         "total": result["total"],
         "offset": offset,
         "limit": limit,
-        "has_more": (offset + limit) < result["total"],
+        "has_more": result["has_more"],
         "limits": limits
     }
 
 # === Visitors Endpoint ===
 
 @app.get("/visitors")
-def get_visitors(user: dict = Depends(get_verified_user)):
+def get_visitors(user: dict = Depends(get_verified_user)) -> dict:
     """Get who visited your profile"""
     visitors = models.get_visitors(user["bot_id"])
     return {"visitors": visitors, "count": len(visitors)}
@@ -226,30 +351,33 @@ def get_visitors(user: dict = Depends(get_verified_user)):
 # === Connection Endpoints ===
 
 @app.post("/connect")
-def send_connection(req: ConnectionRequest, user: dict = Depends(get_verified_user)):
+def send_connection(req: ConnectionRequest, user: dict = Depends(get_verified_user)) -> dict:
     """Send connection request"""
-    # Check limits
-    if not models.check_limit(user["bot_id"], "connection_requests"):
-        raise HTTPException(status_code=429, detail="Daily connection request limit reached (3/day)")
+    # Consume a request up front; refunded if the request isn't created
+    if not quota.consume(user["bot_id"], "connection_requests"):
+        limit = quota.get_limits(user["bot_id"])["connection_requests_limit"]
+        raise HTTPException(status_code=429, detail=f"Daily connection request limit reached ({limit}/day)")
 
     # Check target exists
     target = models.get_profile(req.to_bot_id)
     if not target:
+        quota.refund(user["bot_id"], "connection_requests")
         raise HTTPException(status_code=404, detail="User not found")
 
     result = models.send_connection_request(user["bot_id"], req.to_bot_id)
     if result["success"]:
         return result
+    quota.refund(user["bot_id"], "connection_requests")
     raise HTTPException(status_code=400, detail=result["error"])
 
 @app.get("/requests")
-def get_requests(user: dict = Depends(get_verified_user)):
+def get_requests(user: dict = Depends(get_verified_user)) -> dict:
     """Get pending connection requests"""
     requests = models.get_pending_requests(user["bot_id"])
     return {"requests": requests, "count": len(requests)}
 
 @app.post("/respond")
-def respond_to_connection(req: RespondRequest, user: dict = Depends(get_verified_user)):
+def respond_to_connection(req: RespondRequest, user: dict = Depends(get_verified_user)) -> dict:
     """Accept or decline connection request"""
     result = models.respond_to_request(req.from_bot_id, user["bot_id"], req.accept)
 
@@ -266,15 +394,19 @@ def respond_to_connection(req: RespondRequest, user: dict = Depends(get_verified
     return result
 
 @app.get("/connections")
-def get_connections(user: dict = Depends(get_verified_user)):
-    """Get all connections"""
+def get_connections(response: Response, user: dict = Depends(get_verified_user),
+                    if_none_match: Optional[str] = Header(None)) -> ConnectionList:
+    """Get all connections. Honours If-None-Match."""
+    not_modified = _not_modified(response, if_none_match, f'"connections-{user["version"]}"')
+    if not_modified:
+        return not_modified
     connections = models.get_connections(user["bot_id"])
     return {"connections": connections, "count": len(connections)}
 
 # === Messaging Endpoints ===
 
 @app.post("/message")
-def send_message(req: MessageRequest, user: dict = Depends(get_verified_user)):
+def send_message(req: MessageRequest, user: dict = Depends(get_verified_user)) -> dict:
     """Send a message to a connected user"""
     result = models.send_message(user["bot_id"], req.to_bot_id, req.content)
     if result["success"]:
@@ -282,35 +414,118 @@ def send_message(req: MessageRequest, user: dict = Depends(get_verified_user)):
     raise HTTPException(status_code=400, detail=result["error"])
 
 @app.get("/messages/{bot_id}")
-def get_messages(bot_id: str, user: dict = Depends(get_verified_user)):
+def get_messages(bot_id: str, user: dict = Depends(get_verified_user)) -> dict:
     """Get conversation with a user"""
     messages = models.get_messages(user["bot_id"], bot_id)
     return {"messages": messages, "count": len(messages)}
 
 @app.get("/conversations")
-def get_conversations(user: dict = Depends(get_verified_user)):
-    """List all conversations"""
+def get_conversations(response: Response, user: dict = Depends(get_verified_user),
+                      if_none_match: Optional[str] = Header(None)) -> dict:
+    """List all conversations. Honours If-None-Match."""
+    not_modified = _not_modified(response, if_none_match, f'"conversations-{user["version"]}"')
+    if not_modified:
+        return not_modified
     conversations = models.get_conversations(user["bot_id"])
     return {"conversations": conversations, "count": len(conversations)}
 
 @app.get("/unread-messages")
-def get_unread_messages(user: dict = Depends(get_verified_user)):
+def get_unread_messages(user: dict = Depends(get_verified_user)) -> dict:
     """Get unread messages for notifications"""
     messages = models.get_unread_messages(user["bot_id"])
     return {"messages": messages, "count": len(messages)}
 
 @app.get("/accepted-connections")
-def get_accepted_connections(user: dict = Depends(get_verified_user)):
+def get_accepted_connections(user: dict = Depends(get_verified_user)) -> dict:
     """Get accepted connections (for notifying the sender)"""
     connections = models.get_accepted_connections(user["bot_id"])
     return {"connections": connections, "count": len(connections)}
 
+# === Sync Endpoint ===
+
+@app.get("/sync")
+def sync(since: Optional[int] = None, limit: int = 100, user: dict = Depends(get_verified_user)) -> dict:
+    """Changes since a cursor from a previous /sync: new messages, requests,
+    acceptances and connections' profile updates. Omit `since` for a snapshot."""
+    return models.get_changes(user["bot_id"], since, max(1, min(limit, 500)))
+
 # === Limits Endpoint ===
 
 @app.get("/limits")
-def get_limits(user: dict = Depends(get_verified_user)):
+def get_limits(user: dict = Depends(get_verified_user)) -> dict:
     """Get daily limits"""
-    return models.get_daily_limits(user["bot_id"])
+    return quota.get_limits(user["bot_id"])
+
+# === Batch Endpoint ===
+
+def _batch_route(method: str, path: str):
+    """Route and path params for a sub-request; only endpoints authenticated
+    with get_verified_user can be batched"""
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or method not in route.methods:
+            continue
+        match = route.path_regex.match(path)
+        if not match:
+            continue
+        param = inspect.signature(route.endpoint).parameters.get("user")
+        if param is None or getattr(param.default, "dependency", None) is not get_verified_user:
+            return None, None
+        return route, {k: route.param_convertors[k].convert(v) for k, v in match.groupdict().items()}
+    return None, None
+
+def _batch_args(route: APIRoute, path_params: dict, query: dict, body: Optional[dict], user: dict) -> dict:
+    """Keyword arguments for a sub-request's endpoint function"""
+    kwargs = {}
+    for name, param in inspect.signature(route.endpoint).parameters.items():
+        if name == "user":
+            kwargs[name] = user
+        elif param.annotation is Response:
+            kwargs[name] = Response()
+        elif isinstance(param.default, Param):
+            # Header parameters (e.g. If-None-Match) aren't forwarded per sub-request
+            kwargs[name] = None
+        elif name in path_params:
+            kwargs[name] = path_params[name]
+        elif inspect.isclass(param.annotation) and issubclass(param.annotation, BaseModel):
+            kwargs[name] = param.annotation(**(body or {}))
+        elif name in query:
+            # Optional[int] -> int
+            kind = next((t for t in get_args(param.annotation) if t is not type(None)), param.annotation)
+            try:
+                kwargs[name] = kind(query[name]) if kind in (int, float) else query[name]
+            except ValueError:
+                raise HTTPException(status_code=422, detail=f"Invalid value for '{name}'")
+        elif param.default is inspect.Parameter.empty:
+            raise HTTPException(status_code=422, detail=f"Missing parameter '{name}'")
+    return kwargs
+
+@app.post("/batch")
+def batch(req: BatchRequest, user: dict = Depends(get_verified_user)) -> dict:
+    """Run several API calls in one round trip: one auth check, one DB connection.
+    Each result is {"status": ..., "body": ...} in request order."""
+    if len(req.requests) > BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX} requests per batch")
+
+    responses = []
+    with models.shared_connection() as conn:
+        for call in req.requests:
+            method = call.method.upper()
+            path, _, query = call.path.partition("?")
+            route, path_params = _batch_route(method, path)
+            try:
+                if route is None or route.endpoint is batch:
+                    raise HTTPException(status_code=404, detail=f"Cannot batch {method} {path}")
+                result = route.endpoint(**_batch_args(route, path_params, dict(parse_qsl(query)), call.body, user))
+                status = 200
+            except HTTPException as e:
+                status, result = e.status_code, {"detail": e.detail}
+            except ValidationError as e:
+                status, result = 422, {"detail": e.errors(include_url=False)}
+            finally:
+                models.release_shared(conn)
+            metrics.batch_calls.inc(1, method, route.path if route else "unmatched", str(status))
+            responses.append({"status": status, "body": result})
+    return {"responses": responses, "count": len(responses)}
 
 # === Admin Endpoints ===
 
@@ -319,41 +534,124 @@ def check_admin(user: dict):
         raise HTTPException(status_code=403, detail="Admin only")
 
 @app.get("/admin/stats")
-def admin_stats(user: dict = Depends(get_verified_user)):
+def admin_stats(user: dict = Depends(get_verified_user)) -> dict:
     """Get platform stats (admin only)"""
     check_admin(user)
     return models.get_stats()
 
 @app.get("/admin/users")
-def admin_users(user: dict = Depends(get_verified_user)):
+def admin_users(user: dict = Depends(get_verified_user)) -> List[AdminUser]:
     """Get all users (admin only)"""
     check_admin(user)
     return models.get_all_users()
 
+@app.get("/admin/search-cache")
+def admin_search_cache(user: dict = Depends(get_verified_user)) -> dict:
+    """Search result cache hit-rate metrics (admin only)"""
+    check_admin(user)
+    return models.get_search_cache_stats()
+
+@app.get("/admin/rate-limits")
+def admin_rate_limits(user: dict = Depends(get_verified_user)) -> dict:
+    """Rate limiter and load-shedding metrics (admin only)"""
+    check_admin(user)
+    return get_rate_limit_stats()
+
+@app.get("/admin/leases")
+def admin_leases(user: dict = Depends(get_verified_user)) -> dict:
+    """Background job lease holders (admin only)"""
+    check_admin(user)
+    return {"leases": models.get_leases(), "worker": leader.HOLDER, "is_leader": leader.is_leader}
+
+@app.get("/admin/queries")
+def admin_queries(limit: int = 20, order: str = "total", user: dict = Depends(get_verified_user)) -> dict:
+    """Top SQL statements by total/avg/max time or calls (admin only)"""
+    check_admin(user)
+    return {
+        "statements": querylog.top_statements(min(limit, 200), order),
+        "slow_query_ms": querylog.SLOW_QUERY_MS,
+        "enabled": querylog.ENABLED,
+    }
+
+@app.delete("/admin/queries")
+def admin_reset_queries(user: dict = Depends(get_verified_user)) -> dict:
+    """Reset collected SQL statement timings (admin only)"""
+    check_admin(user)
+    querylog.reset()
+    return {"success": True}
+
 @app.delete("/admin/user/{bot_id}")
-def admin_delete_user(bot_id: str, user: dict = Depends(get_verified_user)):
+def admin_delete_user(bot_id: str, user: dict = Depends(get_verified_user)) -> dict:
     """Delete a user (admin only)"""
     check_admin(user)
-    return models.delete_user(bot_id)
+    result = models.delete_user(bot_id)
+    quota.forget(bot_id)
+    web_ui.invalidate_profile_page(bot_id)
+    return result
+
+@app.post("/admin/user/{bot_id}/tier")
+def admin_set_tier(bot_id: str, req: TierRequest, user: dict = Depends(get_verified_user)) -> dict:
+    """Set a user's daily quota tier (admin only)"""
+    check_admin(user)
+    if req.tier not in quota.TIERS:
+        raise HTTPException(status_code=400, detail=f"Unknown tier. Available: {', '.join(quota.TIERS)}")
+    result = models.set_user_tier(bot_id, req.tier)
+    if not result["success"]:
+        raise HTTPException(status_code=404, detail=result["error"])
+    quota.flush()
+    quota.forget(bot_id)
+    return result
 
 # === Cleanup Task ===
 
+# Seconds between checks for profile writes made by other workers
+CACHE_SYNC_INTERVAL = float(os.environ.get("INTROS_CACHE_SYNC_INTERVAL", "1"))
+
+async def cleanup_expired_requests():
+    """Cleanup expired requests (once, when this worker becomes leader)"""
+    deleted = await asyncio.to_thread(models.cleanup_expired_requests)
+    print(f"Cleaned up {deleted} expired requests")
+    pruned = await asyncio.to_thread(models.prune_sync_log)
+    print(f"Pruned {pruned} sync log entries")
+
+async def start_cache_sync_loop():
+    """Drop in-process search caches when another worker changed profiles"""
+    while True:
+        await asyncio.sleep(CACHE_SYNC_INTERVAL)
+        try:
+            await asyncio.to_thread(models.sync_profile_caches)
+        except Exception as e:
+            print(f"Cache sync error: {e}")
+
 @app.on_event("startup")
 async def startup_event():
-    # Cleanup expired requests
-    deleted = models.cleanup_expired_requests()
-    print(f"Cleaned up {deleted} expired requests")
+    # Exactly one worker (the lease holder) runs cleanup, the verify bot and
+    # the notification loop (checks every 60s, sends via Telegram)
+    asyncio.create_task(leader.run_as_leader(
+        [cleanup_expired_requests, start_verify_bot, start_notification_loop]))
+
+    # Write in-memory quota usage back to SQLite periodically
+    asyncio.create_task(quota.start_flush_loop())
 
-    # Start verify bot in background
-    asyncio.create_task(start_verify_bot())
+    # Follow profile writes made by other workers
+    asyncio.create_task(start_cache_sync_loop())
 
-    # Start notification loop (checks every 60s, sends via Telegram)
-    asyncio.create_task(start_notification_loop())
+@app.on_event("shutdown")
+def shutdown_event():
+    quota.flush()
+    leader.release()
 
 # === Health Check ===
 
+@app.get("/metrics")
+def get_metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus metrics"""
+    if METRICS_TOKEN and authorization != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
-async def health():
+async def health() -> dict:
     return {"status": "ok", "service": "intros"}
 
 if __name__ == "__main__":
@@ -0,0 +1,202 @@
+"""Lightweight in-process metrics registry for Intros (Prometheus text format)"""
+
+import functools
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Tuple
+
+# Latency buckets in seconds, shared by every histogram
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Counter:
+    """Monotonic counter, optionally split by labels"""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self.values = {}
+        self.lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount: float = 1, *label_values):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            items = list(self.values.items())
+        for key, value in items:
+            yield self.name + _format_labels(self.labels, key), value
+
+class Gauge(Counter):
+    """Value that goes up and down; pass fn to read it at scrape time instead"""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), fn: Callable = None):
+        super().__init__(name, help, labels)
+        self.fn = fn
+
+    def set(self, value: float, *label_values):
+        with self.lock:
+            self.values[label_values] = value
+
+    def dec(self, amount: float = 1, *label_values):
+        self.inc(-amount, *label_values)
+
+    def samples(self):
+        if self.fn is None:
+            yield from super().samples()
+            return
+        try:
+            value = self.fn()
+        except Exception:
+            return
+        if isinstance(value, dict):
+            for key, v in value.items():
+                yield self.name + _format_labels(self.labels, (key,)), v
+        else:
+            yield self.name, value
+
+class Histogram(Counter):
+    """Bucketed distribution of observed values (seconds)"""
+    kind = "histogram"
+
+    def observe(self, value: float, *label_values):
+        with self.lock:
+            series = self.values.get(label_values)
+            if series is None:
+                series = self.values[label_values] = [0] * (len(BUCKETS) + 2)
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(BUCKETS)] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self.lock:
+            items = [(key, list(series)) for key, series in self.values.items()]
+        for key, series in items:
+            cumulative = 0
+            for bound, n in zip(BUCKETS + ("+Inf",), series):
+                cumulative += n
+                yield self.name + "_bucket" + _format_labels(self.labels, key, f'le="{bound}"'), cumulative
+            yield self.name + "_count" + _format_labels(self.labels, key), cumulative
+            yield self.name + "_sum" + _format_labels(self.labels, key), series[-1]
+
+def render() -> str:
+    """All metrics in Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, value in metric.samples():
+            lines.append(f"{name} {value:g}" if isinstance(value, float) else f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+# === Application metrics ===
+
+http_requests = Counter("intros_http_requests_total", "HTTP requests by route and status",
+                        ("method", "route", "status"))
+http_latency = Histogram("intros_http_request_seconds", "HTTP request latency by route",
+                         ("method", "route"))
+http_in_flight = Gauge("intros_http_requests_in_flight", "HTTP requests currently being handled")
+batch_calls = Counter("intros_batch_calls_total", "Sub-requests served through /batch by route and status",
+                      ("method", "route", "status"))
+
+db_latency = Histogram("intros_db_call_seconds", "Time spent in models.py functions", ("function",))
+db_errors = Counter("intros_db_call_errors_total", "models.py calls that raised", ("function",))
+db_connections_opened = Counter("intros_db_connections_opened_total", "SQLite connections opened")
+db_connections_open = Gauge("intros_db_connections_open", "SQLite connections currently open")
+
+notify_cycle = Histogram("intros_notification_cycle_seconds", "Duration of one notification sweep")
+notify_users = Gauge("intros_notification_users", "Users checked in the last notification sweep")
+telegram_sends = Counter("intros_telegram_sends_total", "Telegram sendMessage calls by result",
+                         ("result",))
+
+def timed(func: Callable) -> Callable:
+    """Record call latency (and failures) of a models.py function"""
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            db_errors.inc(1, name)
+            raise
+        finally:
+            db_latency.observe(time.perf_counter() - start, name)
+    return wrapper
+
+def instrument_module(namespace: Dict, module_name: str, exclude: Tuple[str, ...] = ()):
+    """Wrap every public function defined in a module with timed()"""
+    for name, value in list(namespace.items()):
+        if (callable(value) and not name.startswith("_") and name not in exclude
+                and not isinstance(value, type)
+                and getattr(value, "__module__", None) == module_name):
+            namespace[name] = timed(value)
+
+class CountedConnection(sqlite3.Connection):
+    """sqlite3 connection factory that tracks how many connections are open"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._counted = True
+        db_connections_opened.inc()
+        db_connections_open.inc()
+
+    def close(self):
+        if self._counted:
+            self._counted = False
+            db_connections_open.dec()
+        super().close()
+
+    def __del__(self):
+        if getattr(self, "_counted", False):
+            self._counted = False
+            db_connections_open.dec()
+
+class MetricsMiddleware:
+    """Per-route request counts and latency histograms"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.dec()
+            # Route templates (/profile/{bot_id}) keep label cardinality bounded
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope.get("method", "")
+            http_latency.observe(time.perf_counter() - start, method, route)
+            http_requests.inc(1, method, route, status[0])
@@ -3,25 +3,123 @@
 import sqlite3
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, NamedTuple
+import bisect
+import contextvars
+import difflib
 import json
+import os
+import re
 import secrets
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from contextlib import contextmanager
+import metrics
+import querylog
+
+DB_PATH = Path(os.environ.get("INTROS_DB_PATH", str(Path.home() / "intros" / "intros.db")))
+
+# FTS5 columns and their bm25 weights (a match in interests outranks one in bio)
+FTS_COLUMNS = ('name', 'interests', 'looking_for', 'location', 'bio')
+BM25_WEIGHTS = {'name': 3.0, 'interests': 4.0, 'looking_for': 3.0, 'location': 2.0, 'bio': 1.0}
+FTS_TOKENIZE = 'porter unicode61 remove_diacritics 2'
+_BM25_RANK = f"bm25(profiles_fts, {', '.join(str(BM25_WEIGHTS[col]) for col in FTS_COLUMNS)})"
+
+# Named column sets for profile reads (table alias p), instead of SELECT *.
+# Cards fill result pages: bio cut to an excerpt, telegram handle only when public.
+BIO_EXCERPT_CHARS = 160
+PROFILE_PROJECTIONS = {
+    "card": ("p.bot_id, p.name, p.interests, p.looking_for, p.location, "
+             f"substr(p.bio, 1, {BIO_EXCERPT_CHARS}) AS bio, "
+             "CASE WHEN p.telegram_public THEN p.telegram_handle END AS telegram_handle"),
+    "full": ("p.bot_id, p.name, p.interests, p.looking_for, p.location, p.bio, "
+             "p.telegram_handle, p.telegram_public, p.created_at, p.updated_at"),
+    "admin": "p.name, p.interests, p.looking_for, p.location",
+}
+
+class ProfileCard(NamedTuple):
+    """One result-page profile: the "card" columns plus the viewer's seen flag"""
+    bot_id: str
+    name: str
+    interests: Optional[str]
+    looking_for: Optional[str]
+    location: Optional[str]
+    bio: Optional[str]
+    telegram_handle: Optional[str]
+    seen: bool = False
+    mutual_connections: Optional[int] = None
+
+    def to_dict(self) -> Dict:
+        profile = self._asdict()
+        if self.mutual_connections is None:
+            del profile['mutual_connections']
+        return profile
 
-DB_PATH = Path.home() / "intros" / "intros.db"
+# Per-connection PRAGMA profiles, chosen with INTROS_PRAGMA_PROFILE. Individual
+# values can be overridden with INTROS_PRAGMAS, e.g. '{"cache_size": -100000}'
+PRAGMA_PROFILES = {
+    # SQLite defaults: fsync on every commit, small page cache
+    "safe": {"synchronous": "FULL", "cache_size": -2000, "mmap_size": 0,
+             "temp_store": "DEFAULT", "wal_autocheckpoint": 1000},
+    # In WAL mode synchronous=NORMAL never corrupts; a power loss can drop the last commits
+    "default": {"synchronous": "NORMAL", "cache_size": -20000, "mmap_size": 268435456,
+                "temp_store": "MEMORY", "wal_autocheckpoint": 1000},
+    "fast": {"synchronous": "NORMAL", "cache_size": -65536, "mmap_size": 1073741824,
+             "temp_store": "MEMORY", "wal_autocheckpoint": 4000},
+}
+PRAGMA_PROFILE = os.environ.get("INTROS_PRAGMA_PROFILE", "default")
+
+def _pragma_script(profile: str = PRAGMA_PROFILE, overrides: Dict = None) -> str:
+    """PRAGMA statements run on every new connection"""
+    pragmas = {"busy_timeout": 5000, **PRAGMA_PROFILES[profile], **(overrides or {})}
+    return ";".join(f"PRAGMA {name}={value}" for name, value in pragmas.items())
+
+_connection_pragmas = _pragma_script(overrides=json.loads(os.environ.get("INTROS_PRAGMAS", "{}")))
+
+# Set inside shared_connection(): get_db() hands out this connection instead
+# of opening a new one
+_shared_conn = contextvars.ContextVar("shared_conn", default=None)
 
 def get_db():
-    """Get database connection with WAL mode and timeout"""
-    conn = sqlite3.connect(DB_PATH, timeout=10)
+    """Get database connection with the configured PRAGMA profile"""
+    shared = _shared_conn.get()
+    if shared is not None:
+        return shared
+    conn = sqlite3.connect(DB_PATH, timeout=10, factory=querylog.connection_factory())
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA busy_timeout=5000")
+    conn.executescript(_connection_pragmas)
     return conn
 
-def init_db():
-    """Initialize database tables"""
+@contextmanager
+def shared_connection():
+    """Serve every get_db() in this context (e.g. the sub-requests of one
+    /batch call) from a single connection; callers' close() is a no-op"""
+    if _shared_conn.get() is not None:
+        yield _shared_conn.get()
+        return
     conn = get_db()
-    c = conn.cursor()
-    
+    conn.close = lambda: None
+    token = _shared_conn.set(conn)
+    try:
+        yield conn
+    finally:
+        _shared_conn.reset(token)
+        release_shared(conn)
+        type(conn).close(conn)
+
+def release_shared(conn):
+    """Discard uncommitted work, as closing a private connection would"""
+    if conn.in_transaction:
+        conn.rollback()
+
+# === Schema Migrations ===
+# Applied in order and recorded in schema_version. Each is idempotent so that
+# databases created before schema_version existed are brought up to date.
+
+def _migrate_baseline(c):
+    """Core tables and indexes"""
     # Users/Bots table
     c.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -120,12 +218,6 @@ def init_db():
         )
     ''')
 
-    # Add openclaw_bot_username column (for deep link buttons in notifications)
-    try:
-        c.execute('ALTER TABLE users ADD COLUMN openclaw_bot_username TEXT')
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-
     # Add indexes for performance
     c.execute('CREATE INDEX IF NOT EXISTS idx_messages_to_unread ON messages(to_bot_id, read)')
     c.execute('CREATE INDEX IF NOT EXISTS idx_messages_from ON messages(from_bot_id)')
@@ -136,38 +228,300 @@ def init_db():
     c.execute('CREATE INDEX IF NOT EXISTS idx_daily_limits_bot_date ON daily_limits(bot_id, date)')
     c.execute('CREATE INDEX IF NOT EXISTS idx_notif_bot ON notifications_sent(bot_id, notification_type)')
 
-    # FTS5 full-text search index for profiles
-    c.execute('''
+def _add_column(c, table: str, column_def: str):
+    try:
+        c.execute(f'ALTER TABLE {table} ADD COLUMN {column_def}')
+    except sqlite3.OperationalError:
+        pass  # Column already exists
+
+def _migrate_bot_username(c):
+    """openclaw_bot_username column (for deep link buttons in notifications)"""
+    _add_column(c, 'users', 'openclaw_bot_username TEXT')
+
+def _migrate_fts(c):
+    """FTS5 full-text index for profiles"""
+    # Tables built with an older tokenizer are dropped and rebuilt from
+    # profiles (triggers resolve by name)
+    c.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'profiles_fts'")
+    row = c.fetchone()
+    if row is not None and FTS_TOKENIZE not in row['sql']:
+        c.execute('DROP TABLE profiles_fts')
+        row = None
+    c.execute(f'''
         CREATE VIRTUAL TABLE IF NOT EXISTS profiles_fts USING fts5(
-            name, interests, looking_for, location, bio,
-            content=profiles, content_rowid=id
+            {', '.join(FTS_COLUMNS)},
+            content=profiles, content_rowid=id,
+            tokenize='{FTS_TOKENIZE}'
         )
     ''')
+    if row is None:
+        c.execute("INSERT INTO profiles_fts(profiles_fts) VALUES ('rebuild')")
+    # Indexed terms with document counts (stems; spell correction reads profiles_words)
+    c.execute("CREATE VIRTUAL TABLE IF NOT EXISTS profiles_vocab USING fts5vocab(profiles_fts, 'row')")
 
     # Triggers to keep FTS in sync with profiles table
-    for trigger_sql in [
-        '''CREATE TRIGGER profiles_ai AFTER INSERT ON profiles BEGIN
-            INSERT INTO profiles_fts(rowid, name, interests, looking_for, location, bio)
-            VALUES (new.id, new.name, new.interests, new.looking_for, new.location, new.bio);
-        END''',
-        '''CREATE TRIGGER profiles_ad AFTER DELETE ON profiles BEGIN
-            INSERT INTO profiles_fts(profiles_fts, rowid, name, interests, looking_for, location, bio)
-            VALUES ('delete', old.id, old.name, old.interests, old.looking_for, old.location, old.bio);
-        END''',
-        '''CREATE TRIGGER profiles_au AFTER UPDATE ON profiles BEGIN
-            INSERT INTO profiles_fts(profiles_fts, rowid, name, interests, looking_for, location, bio)
-            VALUES ('delete', old.id, old.name, old.interests, old.looking_for, old.location, old.bio);
-            INSERT INTO profiles_fts(rowid, name, interests, looking_for, location, bio)
-            VALUES (new.id, new.name, new.interests, new.looking_for, new.location, new.bio);
-        END''',
-    ]:
-        try:
-            c.execute(trigger_sql)
-        except sqlite3.OperationalError:
-            pass  # Trigger already exists
+    c.execute('''CREATE TRIGGER IF NOT EXISTS profiles_ai AFTER INSERT ON profiles BEGIN
+        INSERT INTO profiles_fts(rowid, name, interests, looking_for, location, bio)
+        VALUES (new.id, new.name, new.interests, new.looking_for, new.location, new.bio);
+    END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS profiles_ad AFTER DELETE ON profiles BEGIN
+        INSERT INTO profiles_fts(profiles_fts, rowid, name, interests, looking_for, location, bio)
+        VALUES ('delete', old.id, old.name, old.interests, old.looking_for, old.location, old.bio);
+    END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS profiles_au AFTER UPDATE ON profiles BEGIN
+        INSERT INTO profiles_fts(profiles_fts, rowid, name, interests, looking_for, location, bio)
+        VALUES ('delete', old.id, old.name, old.interests, old.looking_for, old.location, old.bio);
+        INSERT INTO profiles_fts(rowid, name, interests, looking_for, location, bio)
+        VALUES (new.id, new.name, new.interests, new.looking_for, new.location, new.bio);
+    END''')
+
+def _migrate_edges(c):
+    """Symmetric adjacency table for accepted connections"""
+    # One row per direction, so connectivity checks are a single primary-key probe
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS edges (
+            bot_id TEXT NOT NULL,
+            other_bot_id TEXT NOT NULL,
+            connection_id INTEGER NOT NULL,
+            PRIMARY KEY (bot_id, other_bot_id)
+        ) WITHOUT ROWID
+    ''')
+    # Keep edges in sync with accepted connections
+    c.execute('''CREATE TRIGGER IF NOT EXISTS connections_accept AFTER UPDATE OF status ON connections
+        WHEN new.status = 'accepted' AND old.status != 'accepted' BEGIN
+        INSERT OR IGNORE INTO edges (bot_id, other_bot_id, connection_id)
+        VALUES (new.from_bot_id, new.to_bot_id, new.id), (new.to_bot_id, new.from_bot_id, new.id);
+    END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS connections_ad AFTER DELETE ON connections
+        WHEN old.status = 'accepted' BEGIN
+        DELETE FROM edges WHERE bot_id = old.from_bot_id AND other_bot_id = old.to_bot_id;
+        DELETE FROM edges WHERE bot_id = old.to_bot_id AND other_bot_id = old.from_bot_id;
+    END''')
+    # Backfill edges for connections accepted before the edges table existed
+    c.execute('''
+        INSERT OR IGNORE INTO edges (bot_id, other_bot_id, connection_id)
+        SELECT from_bot_id, to_bot_id, id FROM connections WHERE status = 'accepted'
+        UNION ALL
+        SELECT to_bot_id, from_bot_id, id FROM connections WHERE status = 'accepted'
+    ''')
 
-    conn.commit()
-    conn.close()
+def _migrate_profile_tags(c):
+    """Normalized profile tags for filters and facets"""
+    # Tags from the comma-separated profile fields, for AND filters across
+    # fields and facet counts (covering PK serves both)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS profile_tags (
+            field TEXT NOT NULL,
+            tag TEXT NOT NULL,
+            profile_id INTEGER NOT NULL,
+            label TEXT NOT NULL,
+            PRIMARY KEY (field, tag, profile_id)
+        ) WITHOUT ROWID
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_profile_tags_profile ON profile_tags(profile_id)')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS profiles_tags_ad AFTER DELETE ON profiles BEGIN
+        DELETE FROM profile_tags WHERE profile_id = old.id;
+    END''')
+    # Backfill tags for profiles created before profile_tags existed
+    c.execute('''
+        SELECT id, interests, looking_for, location FROM profiles
+        WHERE id NOT IN (SELECT profile_id FROM profile_tags)
+    ''')
+    for row in c.fetchall():
+        _sync_profile_tags(c, row['id'], dict(row))
+
+def _migrate_tier(c):
+    """tier column (selects the daily quota set, see quota.py)"""
+    _add_column(c, 'users', "tier TEXT DEFAULT 'free'")
+
+def _migrate_coordination(c):
+    """Leases and shared cache generations for multi-worker deployments"""
+    # One row per lease; the holder must renew before expires_at (unix time)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS leases (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    ''')
+    # Bumped by triggers on every profile write, polled by each worker to drop
+    # its in-process search caches when another process changed profiles
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS cache_generations (
+            name TEXT PRIMARY KEY,
+            generation INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    c.execute("INSERT OR IGNORE INTO cache_generations (name) VALUES ('profiles')")
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS profiles_generation_{event.lower()} AFTER {event} ON profiles BEGIN
+            UPDATE cache_generations SET generation = generation + 1 WHERE name = 'profiles';
+        END''')
+
+_BUMP_VERSION = '''INSERT INTO user_versions (bot_id, version) VALUES ({0}, 1)
+            ON CONFLICT(bot_id) DO UPDATE SET version = version + 1;'''
+# Everyone with a connection row (pending or accepted) to {0} sees their profile
+_BUMP_CONTACT_VERSIONS = '''INSERT INTO user_versions (bot_id, version)
+            SELECT other, 1 FROM (
+                SELECT to_bot_id AS other FROM connections WHERE from_bot_id = {0}
+                UNION SELECT from_bot_id FROM connections WHERE to_bot_id = {0}
+            ) WHERE true
+            ON CONFLICT(bot_id) DO UPDATE SET version = version + 1;'''
+
+def _migrate_user_versions(c):
+    """Per-user version counters for ETags on /profile, /connections and /conversations"""
+    # Bumped by triggers whenever anything shown in a user's own views changes:
+    # their profile, a contact's profile, their connections or their messages
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS user_versions (
+            bot_id TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        row = 'old' if event == 'DELETE' else 'new'
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS profiles_version_{event.lower()} AFTER {event} ON profiles BEGIN
+            {_BUMP_VERSION.format(f"{row}.bot_id")}
+            {_BUMP_CONTACT_VERSIONS.format(f"{row}.bot_id")}
+        END''')
+        for table in ('connections', 'messages'):
+            c.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table} BEGIN
+            {_BUMP_VERSION.format(f"{row}.from_bot_id")}
+            {_BUMP_VERSION.format(f"{row}.to_bot_id")}
+        END''')
+
+def _migrate_sync_log(c):
+    """Per-user change log behind the /sync cursor"""
+    # seq is the cursor handed to clients; AUTOINCREMENT so pruned values are never reused
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS sync_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            bot_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            ref_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_sync_log_bot_seq ON sync_log(bot_id, seq)')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS messages_sync_insert AFTER INSERT ON messages BEGIN
+        INSERT INTO sync_log (bot_id, kind, ref_id) VALUES (new.to_bot_id, 'message', new.id);
+    END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS connections_sync_insert AFTER INSERT ON connections
+        WHEN new.status = 'pending' BEGIN
+        INSERT INTO sync_log (bot_id, kind, ref_id) VALUES (new.to_bot_id, 'request', new.id);
+    END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS connections_sync_accept AFTER UPDATE OF status ON connections
+        WHEN new.status = 'accepted' AND old.status != 'accepted' BEGIN
+        INSERT INTO sync_log (bot_id, kind, ref_id) VALUES (new.from_bot_id, 'accepted', new.id);
+    END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS profiles_sync_update AFTER UPDATE ON profiles BEGIN
+        INSERT INTO sync_log (bot_id, kind, ref_id)
+        SELECT other_bot_id, 'profile', new.id FROM edges WHERE bot_id = new.bot_id;
+    END''')
+
+def _migrate_read_indexes(c):
+    """Covering indexes for the per-request visitor lookups and browse order"""
+    # _get_seen_bot_ids runs on every search; get_visitors orders by visited_at
+    c.execute('CREATE INDEX IF NOT EXISTS idx_visitors_seen ON visitors(visitor_bot_id, visited_bot_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_visitors_recent ON visitors(visited_bot_id, visited_at)')
+    c.execute('DROP INDEX IF EXISTS idx_visitors_visitor')
+    c.execute('DROP INDEX IF EXISTS idx_visitors_visited')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_profiles_updated ON profiles(updated_at)')
+
+def _migrate_spelling_vocab(c):
+    """Unstemmed word index for spell correction"""
+    # profiles_vocab holds porter stems ("startup", "engin"), which are neither
+    # safe to compare typos against nor to show as corrections. Same columns,
+    # plain tokenizer; detail=none keeps it to the term list and doc counts.
+    c.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS profiles_words USING fts5(
+            {', '.join(FTS_COLUMNS)},
+            content=profiles, content_rowid=id, detail=none,
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    ''')
+    c.execute("INSERT INTO profiles_words(profiles_words) VALUES ('rebuild')")
+    c.execute("CREATE VIRTUAL TABLE IF NOT EXISTS profiles_words_vocab USING fts5vocab(profiles_words, 'row')")
+    c.execute('''CREATE TRIGGER IF NOT EXISTS profiles_words_ai AFTER INSERT ON profiles BEGIN
+        INSERT INTO profiles_words(rowid, name, interests, looking_for, location, bio)
+        VALUES (new.id, new.name, new.interests, new.looking_for, new.location, new.bio);
+    END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS profiles_words_ad AFTER DELETE ON profiles BEGIN
+        INSERT INTO profiles_words(profiles_words, rowid, name, interests, looking_for, location, bio)
+        VALUES ('delete', old.id, old.name, old.interests, old.looking_for, old.location, old.bio);
+    END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS profiles_words_au
+        AFTER UPDATE OF name, interests, looking_for, location, bio ON profiles BEGIN
+        INSERT INTO profiles_words(profiles_words, rowid, name, interests, looking_for, location, bio)
+        VALUES ('delete', old.id, old.name, old.interests, old.looking_for, old.location, old.bio);
+        INSERT INTO profiles_words(rowid, name, interests, looking_for, location, bio)
+        VALUES (new.id, new.name, new.interests, new.looking_for, new.location, new.bio);
+    END''')
+
+def _migrate_retag_profiles(c):
+    """Rebuild every profile's tags from its current fields"""
+    # Migration 5 only tagged profiles that had no tag rows yet; re-derive all
+    # of them once so every database starts from the same normalized tags
+    c.execute('SELECT id, interests, looking_for, location FROM profiles')
+    for row in c.fetchall():
+        _sync_profile_tags(c, row['id'], dict(row))
+
+# (version, migration). Append new migrations; never reorder or edit applied ones.
+MIGRATIONS = [
+    (1, _migrate_baseline),
+    (2, _migrate_bot_username),
+    (3, _migrate_fts),
+    (4, _migrate_edges),
+    (5, _migrate_profile_tags),
+    (6, _migrate_tier),
+    (7, _migrate_coordination),
+    (8, _migrate_user_versions),
+    (9, _migrate_sync_log),
+    (10, _migrate_read_indexes),
+    (11, _migrate_spelling_vocab),
+    (12, _migrate_retag_profiles),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def _schema_version(c) -> int:
+    c.execute('SELECT MAX(version) FROM schema_version')
+    return c.fetchone()[0] or 0
+
+def init_db():
+    """Create the database or apply pending migrations (a single query when current)"""
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = get_db()
+    c = conn.cursor()
+    try:
+        if _schema_version(c) >= SCHEMA_VERSION:
+            conn.close()
+            return
+    except sqlite3.OperationalError:
+        pass  # No schema_version table yet
+
+    # journal_mode is stored in the database file, so it is set once here
+    c.execute('PRAGMA journal_mode=WAL')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # Take the write lock first so concurrent workers apply each migration once
+    c.execute('BEGIN IMMEDIATE')
+    try:
+        current = _schema_version(c)
+        for version, migrate in MIGRATIONS:
+            if version > current:
+                print(f"Applying migration {version}: {migrate.__doc__.splitlines()[0]}")
+                migrate(c)
+                c.execute('INSERT INTO schema_version (version) VALUES (?)', (version,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
 
 # === User/Registration Functions ===
 
@@ -241,14 +595,32 @@ def get_user_by_bot_id(bot_id: str) -> Optional[Dict]:
     return dict(row) if row else None
 
 def get_user_by_api_key(api_key: str) -> Optional[Dict]:
-    """Get user by API key"""
+    """Get user by API key, with their current user_versions counter"""
     conn = get_db()
     c = conn.cursor()
-    c.execute('SELECT * FROM users WHERE api_key = ?', (api_key,))
+    c.execute('''
+        SELECT u.*, COALESCE(v.version, 0) AS version
+        FROM users u LEFT JOIN user_versions v ON v.bot_id = u.bot_id
+        WHERE u.api_key = ?
+    ''', (api_key,))
     row = c.fetchone()
     conn.close()
     return dict(row) if row else None
 
+def get_user_version(bot_id: str) -> Optional[int]:
+    """Version counter of everything shown in a user's profile and lists.
+    None if the user has no profile."""
+    conn = get_db()
+    c = conn.cursor()
+    c.execute('''
+        SELECT COALESCE(v.version, 0) FROM profiles p
+        LEFT JOIN user_versions v ON v.bot_id = p.bot_id
+        WHERE p.bot_id = ?
+    ''', (bot_id,))
+    row = c.fetchone()
+    conn.close()
+    return row[0] if row else None
+
 def is_verified(api_key: str) -> bool:
     """Check if user is verified"""
     user = get_user_by_api_key(api_key)
@@ -266,6 +638,7 @@ def create_or_update_profile(bot_id: str, data: Dict) -> Dict[str, Any]:
     exists = c.fetchone()
     
     if exists:
+        profile_id = exists['id']
         c.execute('''
             UPDATE profiles SET
                 name = ?, interests = ?, looking_for = ?, location = ?,
@@ -286,77 +659,341 @@ def create_or_update_profile(bot_id: str, data: Dict) -> Dict[str, Any]:
             data.get('location'), data.get('bio'), data.get('telegram_handle'),
             data.get('telegram_public', 0)
         ))
-    
+        profile_id = c.lastrowid
+
+    _sync_profile_tags(c, profile_id, data)
     conn.commit()
     conn.close()
+    _invalidate_profile_caches()
     return {"success": True}
 
+# === Tag/Facet Functions ===
+
+TAG_FIELDS = ('interests', 'looking_for', 'location')
+# Values returned per field in facet counts
+FACET_LIMIT = 10
+
+_global_facets = None
+
+def _split_tags(value: Optional[str]) -> Dict[str, str]:
+    """Split a comma-separated field into {normalized_tag: label}"""
+    tags = {}
+    for part in (value or '').split(','):
+        label = ' '.join(part.split())
+        if label:
+            tags.setdefault(label.lower(), label)
+    return tags
+
+def _sync_profile_tags(c, profile_id: int, data: Dict):
+    """Replace a profile's tag rows from its comma-separated fields"""
+    c.execute('DELETE FROM profile_tags WHERE profile_id = ?', (profile_id,))
+    c.executemany(
+        'INSERT INTO profile_tags (field, tag, profile_id, label) VALUES (?, ?, ?, ?)',
+        [(field, tag, profile_id, label)
+         for field in TAG_FIELDS
+         for tag, label in _split_tags(data.get(field)).items()])
+
+def _invalidate_profile_caches():
+    """Bump the profiles generation after a write: stale search cache entries are
+    ignored from now on, facet aggregates and the term index are dropped"""
+    global _profiles_generation, _global_facets, _term_index
+    with _search_cache_lock:
+        _profiles_generation += 1
+    _global_facets = None
+    _term_index = None
+
+_shared_generation = None
+
+def sync_profile_caches() -> bool:
+    """Drop in-process profile caches if any process wrote profiles since the
+    last check. Returns True when caches were invalidated."""
+    global _shared_generation
+    conn = get_db()
+    c = conn.cursor()
+    c.execute("SELECT generation FROM cache_generations WHERE name = 'profiles'")
+    row = c.fetchone()
+    conn.close()
+    generation = row[0] if row else 0
+    if generation == _shared_generation:
+        return False
+    stale = _shared_generation is not None
+    _shared_generation = generation
+    if stale:
+        _invalidate_profile_caches()
+    return stale
+
+def _parse_filters(interests: str = None, looking_for: str = None,
+                   location: str = None) -> Dict[str, List[str]]:
+    """Normalize filter inputs to {field: [tags]}, skipping empty fields"""
+    filters = {}
+    for field, value in zip(TAG_FIELDS, (interests, looking_for, location)):
+        tags = list(_split_tags(value))
+        if tags:
+            filters[field] = tags
+    return filters
+
+def _tag_filter_sql(filters: Dict[str, List[str]]):
+    """AND clause across fields (any value within a field) for profiles aliased p.
+    Values match as whole words within the field: location=India finds
+    "Mumbai India" but not "Indiana", interests=AI not "Airbnb"."""
+    if not filters:
+        return '', []
+    clauses = []
+    for field, tags in filters.items():
+        terms = ['"' + ' '.join(re.findall(r'\w+', tag)) + '"' for tag in tags if re.search(r'\w', tag)]
+        if terms:
+            clauses.append(f"{field} : ({' OR '.join(terms)})")
+    if not clauses:
+        return '', []
+    return ' AND p.id IN (SELECT rowid FROM profiles_fts WHERE profiles_fts MATCH ?)', [' AND '.join(clauses)]
+
+def _facet_counts(conn, fts_query: str = None, filters: Dict[str, List[str]] = None) -> Dict[str, List[Dict]]:
+    """Per-field tag counts over the matching profiles. Unfiltered counts are cached."""
+    global _global_facets
+    if not fts_query and not filters:
+        if _global_facets is None:
+            c = conn.cursor()
+            c.execute('''
+                SELECT field, tag, MIN(label) as label, COUNT(*) as n
+                FROM profile_tags GROUP BY field, tag ORDER BY n DESC
+            ''')
+            _global_facets = _group_facets(c.fetchall())
+        return _global_facets
+
+    filter_sql, params = _tag_filter_sql(filters or {})
+    if fts_query:
+        matched = f'''SELECT p.id FROM profiles_fts JOIN profiles p ON p.id = profiles_fts.rowid
+                      WHERE profiles_fts MATCH ?{filter_sql}'''
+        params = [fts_query, *params]
+    else:
+        matched = f'SELECT p.id FROM profiles p WHERE 1 = 1{filter_sql}'
+    c = conn.cursor()
+    c.execute(f'''
+        SELECT field, tag, MIN(label) as label, COUNT(*) as n
+        FROM profile_tags WHERE profile_id IN ({matched})
+        GROUP BY field, tag ORDER BY n DESC
+    ''', params)
+    return _group_facets(c.fetchall())
+
+def _group_facets(rows) -> Dict[str, List[Dict]]:
+    """Group (field, tag, label, n) rows into the top FACET_LIMIT values per field"""
+    facets = {field: [] for field in TAG_FIELDS}
+    for row in rows:
+        values = facets[row['field']]
+        if len(values) < FACET_LIMIT:
+            values.append({"value": row['label'], "count": row['n']})
+    return facets
+
 def get_profile(bot_id: str, viewer_bot_id: str = None) -> Optional[Dict]:
     """Get a profile, optionally recording the visit"""
     conn = get_db()
     c = conn.cursor()
 
-    c.execute('SELECT * FROM profiles WHERE bot_id = ?', (bot_id,))
+    c.execute(f'SELECT {PROFILE_PROJECTIONS["full"]} FROM profiles p WHERE p.bot_id = ?', (bot_id,))
     row = c.fetchone()
 
     if row and viewer_bot_id and viewer_bot_id != bot_id:
-        # Record visit
+        # Record visit (the daily view itself is consumed by the caller via quota)
         c.execute('''
             INSERT INTO visitors (visitor_bot_id, visited_bot_id)
             VALUES (?, ?)
         ''', (viewer_bot_id, bot_id))
-
-        # Update daily limit
-        today = datetime.now().strftime('%Y-%m-%d')
-        c.execute('''
-            INSERT INTO daily_limits (bot_id, date, profile_views)
-            VALUES (?, ?, 1)
-            ON CONFLICT(bot_id, date) DO UPDATE SET profile_views = profile_views + 1
-        ''', (viewer_bot_id, today))
-
         conn.commit()
 
     if row:
         profile = dict(row)
         # Hide telegram if not public and not connected (inline check, no extra connection)
         if not profile['telegram_public'] and viewer_bot_id:
-            c.execute('''
-                SELECT 1 FROM connections
-                WHERE status = 'accepted' AND (
-                    (from_bot_id = ? AND to_bot_id = ?) OR
-                    (from_bot_id = ? AND to_bot_id = ?)
-                )
-            ''', (viewer_bot_id, bot_id, bot_id, viewer_bot_id))
-            if not c.fetchone():
+            if not _is_connected(c, viewer_bot_id, bot_id):
                 profile['telegram_handle'] = None
         conn.close()
         return profile
     conn.close()
     return None
 
+def get_owner_view(bot_id: str, visitor_limit: int = 20) -> Optional[Dict]:
+    """A profile with its recent visitors, connections and pending requests,
+    read in one query (the lists come back as JSON arrays)"""
+    conn = get_db()
+    c = conn.cursor()
+    c.execute(f'''
+        SELECT {PROFILE_PROJECTIONS["full"]},
+            (SELECT json_group_array(json_object('visitor_bot_id', visitor_bot_id,
+                                                 'visited_at', visited_at, 'name', name))
+             FROM (SELECT v.visitor_bot_id, v.visited_at, vp.name
+                   FROM visitors v JOIN profiles vp ON vp.bot_id = v.visitor_bot_id
+                   WHERE v.visited_bot_id = ?
+                   ORDER BY v.visited_at DESC LIMIT ?)) AS visitors,
+            (SELECT json_group_array(json_object('bot_id', bot_id, 'name', name,
+                                                 'connected_at', connected_at))
+             FROM (SELECT cp.bot_id, cp.name, cn.created_at AS connected_at
+                   FROM edges e
+                   JOIN connections cn ON cn.id = e.connection_id
+                   JOIN profiles cp ON cp.bot_id = e.other_bot_id
+                   WHERE e.bot_id = ?
+                   ORDER BY cn.responded_at DESC)) AS connections,
+            (SELECT json_group_array(json_object('from_bot_id', from_bot_id, 'name', name,
+                                                 'created_at', created_at))
+             FROM (SELECT r.from_bot_id, rp.name, r.created_at
+                   FROM connections r JOIN profiles rp ON rp.bot_id = r.from_bot_id
+                   WHERE r.to_bot_id = ? AND r.status = 'pending'
+                   ORDER BY r.created_at DESC)) AS requests
+        FROM profiles p WHERE p.bot_id = ?
+    ''', (bot_id, visitor_limit, bot_id, bot_id, bot_id))
+    row = c.fetchone()
+    conn.close()
+    if not row:
+        return None
+    view = dict(row)
+    for key in ('visitors', 'connections', 'requests'):
+        view[key] = json.loads(view[key])
+    return view
+
+def _is_connected(c, bot_id_1: str, bot_id_2: str) -> bool:
+    """Primary-key probe on edges using an existing cursor"""
+    c.execute('SELECT 1 FROM edges WHERE bot_id = ? AND other_bot_id = ?', (bot_id_1, bot_id_2))
+    return c.fetchone() is not None
+
+# column:term, column:"phrase", "phrase" or bare term (optionally prefix*)
+_FTS_TOKEN = re.compile(r'(?:(\w+):)?(?:"([^"]*)"?|([^\s"]+))')
+
 def _sanitize_fts_query(text: str) -> str:
-    """Build an OR query from text, stripping FTS5 special chars"""
-    terms = text.replace(',', ' ').split()
-    safe = []
-    for t in terms:
-        cleaned = ''.join(ch for ch in t if ch.isalnum() or ch == '_')
-        if cleaned:
-            safe.append(cleaned)
-    return ' OR '.join(safe) if safe else ''
-
-def _clean_results(rows, viewer_bot_id: str = None, seen_bot_ids: set = None) -> List[Dict]:
-    """Clean profile rows: hide telegram, add seen flag, remove rank"""
-    results = []
-    for row in rows:
-        profile = dict(row)
-        profile.pop('rank', None)
-        profile.pop('seen_flag', None)
-        if not profile.get('telegram_public'):
-            profile['telegram_handle'] = None
-        if seen_bot_ids is not None:
-            profile['seen'] = profile['bot_id'] in seen_bot_ids
-        results.append(profile)
-    return results
+    """Build a safe FTS5 query. Free terms are OR'ed; column-scoped terms
+    (location:mumbai) are AND'ed across columns and OR'ed within one.
+    "Exact phrases" and prefix* are kept; every term is quoted."""
+    free = []
+    scoped = {}
+    for column, phrase, bare in _FTS_TOKEN.findall(text.replace(',', ' ')):
+        column = column.lower()
+        if column and column not in FTS_COLUMNS:
+            free.append(f'"{column}"')
+            column = ''
+        source = phrase if phrase else bare
+        words = re.findall(r'\w+', source)
+        if not words:
+            continue
+        term = '"' + ' '.join(words) + '"'
+        if not phrase and bare.endswith('*'):
+            term += '*'
+        if column:
+            scoped.setdefault(column, []).append(term)
+        else:
+            free.append(term)
+
+    parts = []
+    if free:
+        parts.append(f"({' OR '.join(free)})" if scoped and len(free) > 1 else ' OR '.join(free))
+    for column, terms in scoped.items():
+        parts.append(f"{column} : ({' OR '.join(terms)})")
+    return ' AND '.join(parts)
+
+# === Term Index (spell correction + autocomplete) ===
+
+# Minimum similarity for a vocabulary term to replace an unmatched query word
+SPELL_CUTOFF = 0.75
+
+_term_index = None
+
+def _fold(text: str) -> str:
+    """Lowercase and strip diacritics (matches the FTS tokenizer)"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+def _trigrams(word: str) -> set:
+    padded = f' {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _get_term_index(conn=None) -> Dict[str, Any]:
+    """Compact in-memory index, rebuilt lazily after profile writes:
+    vocabulary terms by trigram for fuzzy matching, and sorted tag keys for prefix lookups"""
+    global _term_index
+    if _term_index is not None:
+        return _term_index
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db()
+    c = conn.cursor()
+
+    # Unstemmed words: a correction is always a word that appears in profiles
+    c.execute('SELECT term, doc FROM profiles_words_vocab')
+    words = {row['term']: row['doc'] for row in c.fetchall()}
+    by_trigram = {}
+    for term in words:
+        for tri in _trigrams(term):
+            by_trigram.setdefault(tri, []).append(term)
+
+    c.execute('''
+        SELECT field, tag, MIN(label) as label, COUNT(*) as n
+        FROM profile_tags GROUP BY field, tag
+    ''')
+    tags = sorted((_fold(row['tag']), row['label'], row['field'], row['n']) for row in c.fetchall())
+    if own_conn:
+        conn.close()
+
+    _term_index = {
+        "words": words,
+        "by_trigram": by_trigram,
+        "tags": tags,
+        "tag_keys": [t[0] for t in tags],
+    }
+    return _term_index
+
+def _correct_word(word: str, index: Dict[str, Any]) -> Optional[str]:
+    """Closest vocabulary term for a word that is not indexed, or None"""
+    word = _fold(word)
+    if word in index["words"] or len(word) < 3:
+        return None
+    candidates = set()
+    for tri in _trigrams(word):
+        candidates.update(index["by_trigram"].get(tri, ()))
+    matches = difflib.get_close_matches(word, candidates, n=3, cutoff=SPELL_CUTOFF)
+    if not matches:
+        return None
+    best = max(matches, key=lambda t: (difflib.SequenceMatcher(None, word, t).ratio(), index["words"][t]))
+    return best
+
+def _spell_correct_fts_query(fts_query: str, conn=None):
+    """Rewrite unmatched words inside quoted terms (prefix terms are left alone).
+    Returns (corrected_query, {original: correction})."""
+    index = _get_term_index(conn)
+    corrections = {}
+
+    def fix(match):
+        words = []
+        for word in match.group(1).split():
+            fixed = _correct_word(word, index)
+            if fixed:
+                corrections[word] = fixed
+            words.append(fixed or word)
+        return '"' + ' '.join(words) + '"'
+
+    corrected = re.sub(r'"([^"]*)"(?!\*)', fix, fts_query)
+    return corrected, corrections
+
+def suggest_terms(prefix: str, limit: int = 10) -> List[Dict]:
+    """Autocomplete interests/looking_for/location values by prefix (no DB hit when cached)"""
+    key = _fold(' '.join(prefix.split()))
+    if not key:
+        return []
+    index = _get_term_index()
+    keys = index["tag_keys"]
+    start = bisect.bisect_left(keys, key)
+    matches = []
+    for folded, label, field, count in index["tags"][start:]:
+        if not folded.startswith(key):
+            break
+        matches.append({"value": label, "field": field, "count": count})
+    matches.sort(key=lambda m: -m["count"])
+    return matches[:limit]
+
+def _card_cursor(conn, seen_bot_ids: set, mutuals: Dict[str, int] = None):
+    """Cursor that builds a ProfileCard per "card" row (no sqlite3.Row or dict)"""
+    c = conn.cursor()
+    if mutuals is None:
+        c.row_factory = lambda cursor, row: ProfileCard(*row, row[0] in seen_bot_ids)
+    else:
+        c.row_factory = lambda cursor, row: ProfileCard(*row, row[0] in seen_bot_ids, mutuals[row[0]])
+    return c
 
 def _get_seen_bot_ids(viewer_bot_id: str, conn=None) -> set:
     """Get set of bot_ids the viewer has already visited"""
@@ -374,81 +1011,226 @@ def _get_seen_bot_ids(viewer_bot_id: str, conn=None) -> set:
     return ids
 
 def _browse_profiles(limit: int = 10, offset: int = 0,
-                     viewer_bot_id: str = None) -> Dict[str, Any]:
-    """Browse all profiles, unseen first then newest"""
+                     viewer_bot_id: str = None, filters: Dict[str, List[str]] = None,
+                     facets: bool = False) -> Dict[str, Any]:
+    """Browse all profiles (optionally tag-filtered), unseen first then newest"""
     conn = get_db()
     seen_ids = _get_seen_bot_ids(viewer_bot_id, conn)
-    c = conn.cursor()
-    c.execute('SELECT COUNT(*) FROM profiles')
-    total = c.fetchone()[0]
+    filter_sql, filter_params = _tag_filter_sql(filters or {})
+    total = _cached_count(conn, ('browse', _filters_key(filters)),
+                          f'SELECT COUNT(*) FROM profiles p WHERE 1 = 1{filter_sql}', filter_params)
+    c = _card_cursor(conn, seen_ids)
     if viewer_bot_id and seen_ids:
         placeholders = ','.join('?' for _ in seen_ids)
         c.execute(f'''
-            SELECT *, CASE WHEN bot_id IN ({placeholders}) THEN 1 ELSE 0 END as seen_flag
-            FROM profiles
-            ORDER BY seen_flag ASC, updated_at DESC
+            SELECT {PROFILE_PROJECTIONS["card"]}
+            FROM profiles p
+            WHERE 1 = 1{filter_sql}
+            ORDER BY p.bot_id IN ({placeholders}), p.updated_at DESC
             LIMIT ? OFFSET ?
-        ''', (*seen_ids, limit, offset))
+        ''', (*filter_params, *seen_ids, limit + 1, offset))
     else:
-        c.execute('SELECT * FROM profiles ORDER BY updated_at DESC LIMIT ? OFFSET ?',
-                  (limit, offset))
+        c.execute(f'''
+            SELECT {PROFILE_PROJECTIONS["card"]} FROM profiles p
+            WHERE 1 = 1{filter_sql}
+            ORDER BY p.updated_at DESC
+            LIMIT ? OFFSET ?
+        ''', (*filter_params, limit + 1, offset))
     rows = c.fetchall()
+    result = {"results": rows[:limit], "total": total, "has_more": len(rows) > limit}
+    if facets:
+        result["facets"] = _facet_counts(conn, None, filters)
     conn.close()
-    return {"results": _clean_results(rows, viewer_bot_id, seen_ids), "total": total}
+    return result
+
+# === Search Result Cache ===
+
+# Ranked candidate lists kept per normalized FTS query (+ filters), LRU-evicted
+SEARCH_CACHE_SIZE = 1024
+# Larger match sets are ranked in SQL per request instead of being cached
+SEARCH_CACHE_MAX_IDS = 5000
+
+_profiles_generation = 0
+_search_cache = OrderedDict()
+_count_cache = OrderedDict()
+_search_cache_lock = threading.Lock()
+_search_cache_stats = {"hits": 0, "misses": 0, "evictions": 0, "count_hits": 0, "count_misses": 0}
+
+def _filters_key(filters: Dict[str, List[str]] = None) -> tuple:
+    return tuple(sorted((f, tuple(t)) for f, t in (filters or {}).items()))
+
+def _cached_count(conn, key: tuple, sql: str, params) -> int:
+    """COUNT(*) result reused until the next profile write"""
+    with _search_cache_lock:
+        entry = _count_cache.get(key)
+        if entry is not None and entry[0] == _profiles_generation:
+            _search_cache_stats["count_hits"] += 1
+            return entry[1]
+        _search_cache_stats["count_misses"] += 1
+        generation = _profiles_generation
 
-def _fts_search(fts_query: str, limit: int = 10, offset: int = 0,
-                viewer_bot_id: str = None) -> Dict[str, Any]:
-    """Run FTS5 search with BM25 ranking, unseen profiles first"""
-    conn = get_db()
-    seen_ids = _get_seen_bot_ids(viewer_bot_id, conn)
     c = conn.cursor()
-    c.execute('SELECT COUNT(*) FROM profiles_fts WHERE profiles_fts MATCH ?', (fts_query,))
+    c.execute(sql, params)
     total = c.fetchone()[0]
 
-    # No match fallback: show browse results instead of empty
+    with _search_cache_lock:
+        _count_cache[key] = (generation, total)
+        _count_cache.move_to_end(key)
+        while len(_count_cache) > SEARCH_CACHE_SIZE:
+            _count_cache.popitem(last=False)
+    return total
+
+def _ranked_bot_ids(conn, fts_query: str, filters: Dict[str, List[str]] = None) -> Optional[List[str]]:
+    """All matching bot_ids in bm25 order, shared across viewers until the next
+    profile write. None when the match set is too large to cache."""
+    key = (fts_query, _filters_key(filters))
+    with _search_cache_lock:
+        entry = _search_cache.get(key)
+        if entry is not None and entry[0] == _profiles_generation:
+            _search_cache.move_to_end(key)
+            _search_cache_stats["hits"] += 1
+            return entry[1]
+        _search_cache_stats["misses"] += 1
+        generation = _profiles_generation
+
+    filter_sql, filter_params = _tag_filter_sql(filters or {})
+    c = conn.cursor()
+    c.execute(f'''
+        SELECT p.bot_id FROM profiles_fts
+        JOIN profiles p ON p.id = profiles_fts.rowid
+        WHERE profiles_fts MATCH ?{filter_sql}
+        ORDER BY {_BM25_RANK}
+        LIMIT ?
+    ''', (fts_query, *filter_params, SEARCH_CACHE_MAX_IDS + 1))
+    ranked = [row[0] for row in c.fetchall()]
+    if len(ranked) > SEARCH_CACHE_MAX_IDS:
+        ranked = None
+
+    with _search_cache_lock:
+        _search_cache[key] = (generation, ranked)
+        _search_cache.move_to_end(key)
+        while len(_search_cache) > SEARCH_CACHE_SIZE:
+            _search_cache.popitem(last=False)
+            _search_cache_stats["evictions"] += 1
+    return ranked
+
+def get_search_cache_stats() -> Dict[str, Any]:
+    """Search cache hit-rate metrics"""
+    with _search_cache_lock:
+        lookups = _search_cache_stats["hits"] + _search_cache_stats["misses"]
+        return {
+            **_search_cache_stats,
+            "hit_rate": round(_search_cache_stats["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": len(_search_cache),
+            "count_entries": len(_count_cache),
+            "generation": _profiles_generation,
+        }
+
+metrics.Gauge("intros_search_cache", "Search cache counters and sizes", ("stat",),
+              fn=lambda: {k: v for k, v in get_search_cache_stats().items() if k != "hit_rate"})
+
+def _rows_by_bot_id(conn, bot_ids: List[str], seen_ids: set,
+                    mutuals: Dict[str, int] = None) -> List[ProfileCard]:
+    """Fetch profile cards for bot_ids, preserving their order"""
+    if not bot_ids:
+        return []
+    placeholders = ','.join('?' for _ in bot_ids)
+    c = _card_cursor(conn, seen_ids, mutuals)
+    c.execute(f'SELECT {PROFILE_PROJECTIONS["card"]} FROM profiles p WHERE p.bot_id IN ({placeholders})',
+              bot_ids)
+    by_id = {card.bot_id: card for card in c.fetchall()}
+    return [by_id[b] for b in bot_ids if b in by_id]
+
+def _ranked_page(conn, fts_query: str, filters: Dict[str, List[str]], viewer_bot_id: str,
+                 seen_ids: set, limit: int, offset: int):
+    """One page of FTS matches excluding the viewer, unseen first.
+    Returns (cards, total, has_more)."""
+    ranked = _ranked_bot_ids(conn, fts_query, filters)
+    if ranked is not None:
+        candidates = [b for b in ranked if b != viewer_bot_id]
+        if seen_ids:
+            candidates = ([b for b in candidates if b not in seen_ids] +
+                          [b for b in candidates if b in seen_ids])
+        rows = _rows_by_bot_id(conn, candidates[offset:offset + limit], seen_ids)
+        return rows, len(candidates), offset + limit < len(candidates)
+
+    # Too many matches to cache: rank in SQL. The total is the cached match
+    # count (an estimate that may include the viewer); has_more is exact.
+    filter_sql, filter_params = _tag_filter_sql(filters or {})
+    total = _cached_count(conn, ('fts', fts_query, _filters_key(filters)), f'''
+        SELECT COUNT(*) FROM profiles_fts
+        JOIN profiles p ON p.id = profiles_fts.rowid
+        WHERE profiles_fts MATCH ?{filter_sql}
+    ''', (fts_query, *filter_params))
     if total == 0:
-        conn.close()
-        return _browse_profiles(limit, offset, viewer_bot_id)
+        return [], 0, False
+    filter_sql += ' AND p.bot_id != ?'
+    filter_params.append(viewer_bot_id or '')
+    c = _card_cursor(conn, seen_ids)
 
-    if viewer_bot_id and seen_ids:
+    if seen_ids:
         placeholders = ','.join('?' for _ in seen_ids)
         c.execute(f'''
-            SELECT p.*,
-                   bm25(profiles_fts) as rank,
-                   CASE WHEN p.bot_id IN ({placeholders}) THEN 1 ELSE 0 END as seen_flag
+            SELECT {PROFILE_PROJECTIONS["card"]}
             FROM profiles_fts
             JOIN profiles p ON p.id = profiles_fts.rowid
-            WHERE profiles_fts MATCH ?
-            ORDER BY seen_flag ASC, rank
+            WHERE profiles_fts MATCH ?{filter_sql}
+            ORDER BY p.bot_id IN ({placeholders}), {_BM25_RANK}
             LIMIT ? OFFSET ?
-        ''', (*seen_ids, fts_query, limit, offset))
+        ''', (fts_query, *filter_params, *seen_ids, limit + 1, offset))
     else:
-        c.execute('''
-            SELECT p.*, bm25(profiles_fts) as rank
+        c.execute(f'''
+            SELECT {PROFILE_PROJECTIONS["card"]}
             FROM profiles_fts
             JOIN profiles p ON p.id = profiles_fts.rowid
-            WHERE profiles_fts MATCH ?
-            ORDER BY rank
+            WHERE profiles_fts MATCH ?{filter_sql}
+            ORDER BY {_BM25_RANK}
             LIMIT ? OFFSET ?
-        ''', (fts_query, limit, offset))
+        ''', (fts_query, *filter_params, limit + 1, offset))
     rows = c.fetchall()
+    return rows[:limit], total, len(rows) > limit
+
+def _fts_search(fts_query: str, limit: int = 10, offset: int = 0,
+                viewer_bot_id: str = None, filters: Dict[str, List[str]] = None,
+                facets: bool = False) -> Dict[str, Any]:
+    """Run FTS5 search with BM25 ranking (optionally tag-filtered), unseen profiles first"""
+    conn = get_db()
+    seen_ids = _get_seen_bot_ids(viewer_bot_id, conn)
+    rows, total, has_more = _ranked_page(conn, fts_query, filters, viewer_bot_id, seen_ids, limit, offset)
+
+    # No match: retry once with misspelled words corrected from the vocabulary
+    corrections = {}
+    if total == 0:
+        corrected, corrections = _spell_correct_fts_query(fts_query, conn)
+        if corrections:
+            fts_query = corrected
+            rows, total, has_more = _ranked_page(conn, fts_query, filters, viewer_bot_id, seen_ids, limit, offset)
+
+    # No match fallback: show browse results (same filters) instead of empty
+    if total == 0:
+        conn.close()
+        return _browse_profiles(limit, offset, viewer_bot_id, filters, facets)
+
+    result = {"results": rows, "total": total, "has_more": has_more}
+    if corrections:
+        result["corrections"] = corrections
+    if facets:
+        result["facets"] = _facet_counts(conn, fts_query, filters)
     conn.close()
-    return {"results": _clean_results(rows, viewer_bot_id, seen_ids), "total": total}
+    return result
 
 def search_profiles(query: str = None, interests: str = None, looking_for: str = None,
                     location: str = None, limit: int = 10, offset: int = 0,
-                    viewer_bot_id: str = None) -> Dict[str, Any]:
-    """Search profiles using FTS5 or browse all. Unseen profiles ranked first."""
+                    viewer_bot_id: str = None, facets: bool = False) -> Dict[str, Any]:
+    """Search profiles using FTS5 or browse all. interests/looking_for/location are
+    AND'ed tag filters (comma-separated values match any). Unseen profiles ranked first.
+    Results are ProfileCard tuples."""
+    filters = _parse_filters(interests, looking_for, location)
     if query:
         fts_query = _sanitize_fts_query(query)
         if fts_query:
-            return _fts_search(fts_query, limit, offset, viewer_bot_id)
-    elif interests or looking_for or location:
-        parts = ' '.join(filter(None, [interests, looking_for, location]))
-        fts_query = _sanitize_fts_query(parts)
-        if fts_query:
-            return _fts_search(fts_query, limit, offset, viewer_bot_id)
-    return _browse_profiles(limit, offset, viewer_bot_id)
+            return _fts_search(fts_query, limit, offset, viewer_bot_id, filters, facets)
+    return _browse_profiles(limit, offset, viewer_bot_id, filters, facets)
 
 def get_recommendations(bot_id: str, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
     """Recommend profiles similar to the user's own profile. Unseen first."""
@@ -456,11 +1238,11 @@ def get_recommendations(bot_id: str, limit: int = 10, offset: int = 0) -> Dict[s
     c = conn.cursor()
 
     # Load own profile inline (avoids extra connection from get_profile)
-    c.execute('SELECT * FROM profiles WHERE bot_id = ?', (bot_id,))
+    c.execute('SELECT interests, looking_for, location FROM profiles WHERE bot_id = ?', (bot_id,))
     row = c.fetchone()
     if not row:
         conn.close()
-        return {"results": [], "total": 0}
+        return {"results": [], "total": 0, "has_more": False}
     profile = dict(row)
 
     # Build query from user's own profile fields
@@ -475,48 +1257,80 @@ def get_recommendations(bot_id: str, limit: int = 10, offset: int = 0) -> Dict[s
         return _browse_profiles(limit, offset, bot_id)
 
     seen_ids = _get_seen_bot_ids(bot_id, conn)
-
-    # Count total (excluding self)
-    c.execute('''
-        SELECT COUNT(*) FROM profiles_fts
-        JOIN profiles p ON p.id = profiles_fts.rowid
-        WHERE profiles_fts MATCH ? AND p.bot_id != ?
-    ''', (fts_query, bot_id))
-    total = c.fetchone()[0]
+    rows, total, has_more = _ranked_page(conn, fts_query, None, bot_id, seen_ids, limit, offset)
 
     # No match fallback
     if total == 0:
         conn.close()
         result = _browse_profiles(limit, offset, bot_id)
-        result["results"] = [p for p in result["results"] if p["bot_id"] != bot_id]
+        result["results"] = [card for card in result["results"] if card.bot_id != bot_id]
         return result
 
-    # Get ranked results excluding self, unseen first
-    if seen_ids:
-        placeholders = ','.join('?' for _ in seen_ids)
-        c.execute(f'''
-            SELECT p.*,
-                   bm25(profiles_fts) as rank,
-                   CASE WHEN p.bot_id IN ({placeholders}) THEN 1 ELSE 0 END as seen_flag
-            FROM profiles_fts
-            JOIN profiles p ON p.id = profiles_fts.rowid
-            WHERE profiles_fts MATCH ? AND p.bot_id != ?
-            ORDER BY seen_flag ASC, rank
-            LIMIT ? OFFSET ?
-        ''', (*seen_ids, fts_query, bot_id, limit, offset))
-    else:
-        c.execute('''
-            SELECT p.*, bm25(profiles_fts) as rank
-            FROM profiles_fts
-            JOIN profiles p ON p.id = profiles_fts.rowid
-            WHERE profiles_fts MATCH ? AND p.bot_id != ?
-            ORDER BY rank
-            LIMIT ? OFFSET ?
-        ''', (fts_query, bot_id, limit, offset))
-    rows = c.fetchall()
     conn.close()
+    return {"results": rows, "total": total, "has_more": has_more}
 
-    return {"results": _clean_results(rows, bot_id, seen_ids), "total": total}
+# Cap on second-degree candidates scored per request (highest mutual counts win)
+NETWORK_CANDIDATE_LIMIT = 500
+# How much FTS relevance (normalized to 0..1) counts relative to one mutual connection
+NETWORK_RELEVANCE_WEIGHT = 1.0
+
+def get_network_recommendations(bot_id: str, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+    """Recommend friends of connections, scored by mutual connections plus
+    profile relevance. Unseen first. Falls back to profile recommendations."""
+    conn = get_db()
+    c = conn.cursor()
+
+    # Second-degree traversal over edges: every hop is a primary-key range scan
+    c.execute('''
+        SELECT e2.other_bot_id AS bot_id, COUNT(*) AS mutuals
+        FROM edges e1
+        JOIN edges e2 ON e2.bot_id = e1.other_bot_id
+        JOIN profiles p ON p.bot_id = e2.other_bot_id
+        WHERE e1.bot_id = ? AND e2.other_bot_id != ?
+          AND NOT EXISTS (SELECT 1 FROM edges x
+                          WHERE x.bot_id = ? AND x.other_bot_id = e2.other_bot_id)
+          AND NOT EXISTS (SELECT 1 FROM connections r
+                          WHERE r.from_bot_id = ? AND r.to_bot_id = e2.other_bot_id)
+          AND NOT EXISTS (SELECT 1 FROM connections r
+                          WHERE r.from_bot_id = e2.other_bot_id AND r.to_bot_id = ?)
+        GROUP BY e2.other_bot_id
+        ORDER BY mutuals DESC
+        LIMIT ?
+    ''', (bot_id, bot_id, bot_id, bot_id, bot_id, NETWORK_CANDIDATE_LIMIT))
+    mutuals = {row['bot_id']: row['mutuals'] for row in c.fetchall()}
+
+    if not mutuals:
+        conn.close()
+        return get_recommendations(bot_id, limit, offset)
+
+    # Blend in FTS relevance against the user's own profile
+    relevance = {}
+    c.execute('SELECT interests, looking_for, location FROM profiles WHERE bot_id = ?', (bot_id,))
+    own = c.fetchone()
+    if own:
+        fts_query = _sanitize_fts_query(' '.join(filter(None, [
+            own['interests'], own['looking_for'], own['location']])))
+        if fts_query:
+            placeholders = ','.join('?' for _ in mutuals)
+            c.execute(f'''
+                SELECT p.bot_id, {_BM25_RANK} as rank
+                FROM profiles_fts
+                JOIN profiles p ON p.id = profiles_fts.rowid
+                WHERE profiles_fts MATCH ? AND p.bot_id IN ({placeholders})
+            ''', (fts_query, *mutuals))
+            relevance = {row['bot_id']: -row['rank'] for row in c.fetchall()}
+    best = max(relevance.values(), default=0) or 1
+
+    seen_ids = _get_seen_bot_ids(bot_id, conn)
+    ranked = sorted(mutuals, key=lambda b: (
+        b in seen_ids,
+        -(mutuals[b] + NETWORK_RELEVANCE_WEIGHT * relevance.get(b, 0) / best),
+    ))
+    page = ranked[offset:offset + limit]
+
+    results = _rows_by_bot_id(conn, page, seen_ids, mutuals)
+    conn.close()
+    return {"results": results, "total": len(ranked), "has_more": offset + limit < len(ranked)}
 
 def record_profile_views(viewer_bot_id: str, viewed_bot_ids: List[str]):
     """Record profile views for multiple profiles at once (search/recommend results)"""
@@ -531,21 +1345,9 @@ def record_profile_views(viewer_bot_id: str, viewed_bot_ids: List[str]):
     # Batch insert visitor records
     c.executemany('INSERT INTO visitors (visitor_bot_id, visited_bot_id) VALUES (?, ?)',
                   [(viewer_bot_id, bot_id) for bot_id in others])
-    # Increment daily limit by total views
-    today = datetime.now().strftime('%Y-%m-%d')
-    c.execute('''
-        INSERT INTO daily_limits (bot_id, date, profile_views)
-        VALUES (?, ?, ?)
-        ON CONFLICT(bot_id, date) DO UPDATE SET profile_views = profile_views + ?
-    ''', (viewer_bot_id, today, len(others), len(others)))
     conn.commit()
     conn.close()
 
-def remaining_profile_views(bot_id: str) -> int:
-    """How many profile views the user has left today"""
-    limits = get_daily_limits(bot_id)
-    return max(0, limits['profile_views_limit'] - limits['profile_views'])
-
 # === Visitor Functions ===
 
 def get_visitors(bot_id: str, limit: int = 20) -> List[Dict]:
@@ -573,10 +1375,11 @@ def send_connection_request(from_bot_id: str, to_bot_id: str) -> Dict[str, Any]:
     conn = get_db()
     c = conn.cursor()
     
-    # Check if already connected or pending
+    # Check if already connected or pending (one unique-index probe per direction)
     c.execute('''
-        SELECT status FROM connections 
-        WHERE (from_bot_id = ? AND to_bot_id = ?) OR (from_bot_id = ? AND to_bot_id = ?)
+        SELECT status FROM connections WHERE from_bot_id = ? AND to_bot_id = ?
+        UNION ALL
+        SELECT status FROM connections WHERE from_bot_id = ? AND to_bot_id = ?
     ''', (from_bot_id, to_bot_id, to_bot_id, from_bot_id))
     
     existing = c.fetchone()
@@ -588,14 +1391,6 @@ def send_connection_request(from_bot_id: str, to_bot_id: str) -> Dict[str, Any]:
             conn.close()
             return {"success": False, "error": "Request already pending"}
     
-    # Update daily limit
-    today = datetime.now().strftime('%Y-%m-%d')
-    c.execute('''
-        INSERT INTO daily_limits (bot_id, date, connection_requests)
-        VALUES (?, ?, 1)
-        ON CONFLICT(bot_id, date) DO UPDATE SET connection_requests = connection_requests + 1
-    ''', (from_bot_id, today))
-    
     # Create request
     try:
         c.execute('''
@@ -654,17 +1449,7 @@ def respond_to_request(from_bot_id: str, to_bot_id: str, accept: bool) -> Dict[s
 def are_connected(bot_id_1: str, bot_id_2: str) -> bool:
     """Check if two bots are connected"""
     conn = get_db()
-    c = conn.cursor()
-    
-    c.execute('''
-        SELECT 1 FROM connections 
-        WHERE status = 'accepted' AND (
-            (from_bot_id = ? AND to_bot_id = ?) OR
-            (from_bot_id = ? AND to_bot_id = ?)
-        )
-    ''', (bot_id_1, bot_id_2, bot_id_2, bot_id_1))
-    
-    result = c.fetchone() is not None
+    result = _is_connected(conn.cursor(), bot_id_1, bot_id_2)
     conn.close()
     return result
 
@@ -674,17 +1459,14 @@ def get_connections(bot_id: str) -> List[Dict]:
     c = conn.cursor()
     
     c.execute('''
-        SELECT p.*, c.created_at as connected_at
-        FROM connections c
-        JOIN profiles p ON (
-            CASE 
-                WHEN c.from_bot_id = ? THEN c.to_bot_id
-                ELSE c.from_bot_id
-            END = p.bot_id
-        )
-        WHERE c.status = 'accepted' AND (c.from_bot_id = ? OR c.to_bot_id = ?)
+        SELECT p.bot_id, p.name, p.interests, p.looking_for, p.location, p.bio,
+               p.telegram_handle, c.created_at as connected_at
+        FROM edges e
+        JOIN connections c ON c.id = e.connection_id
+        JOIN profiles p ON p.bot_id = e.other_bot_id
+        WHERE e.bot_id = ?
         ORDER BY c.responded_at DESC
-    ''', (bot_id, bot_id, bot_id))
+    ''', (bot_id,))
     
     rows = c.fetchall()
     conn.close()
@@ -701,14 +1483,7 @@ def send_message(from_bot_id: str, to_bot_id: str, content: str) -> Dict[str, An
     c = conn.cursor()
 
     # Check if connected (inline, same connection)
-    c.execute('''
-        SELECT 1 FROM connections
-        WHERE status = 'accepted' AND (
-            (from_bot_id = ? AND to_bot_id = ?) OR
-            (from_bot_id = ? AND to_bot_id = ?)
-        )
-    ''', (from_bot_id, to_bot_id, to_bot_id, from_bot_id))
-    if not c.fetchone():
+    if not _is_connected(c, from_bot_id, to_bot_id):
         conn.close()
         return {"success": False, "error": "You must be connected to send messages"}
 
@@ -729,14 +1504,7 @@ def get_messages(bot_id: str, other_bot_id: str, limit: int = 50) -> List[Dict]:
     c = conn.cursor()
 
     # Check if connected (inline, same connection)
-    c.execute('''
-        SELECT 1 FROM connections
-        WHERE status = 'accepted' AND (
-            (from_bot_id = ? AND to_bot_id = ?) OR
-            (from_bot_id = ? AND to_bot_id = ?)
-        )
-    ''', (bot_id, other_bot_id, other_bot_id, bot_id))
-    if not c.fetchone():
+    if not _is_connected(c, bot_id, other_bot_id):
         conn.close()
         return []
 
@@ -832,40 +1600,229 @@ def get_accepted_connections(bot_id: str) -> List[Dict]:
 
     return [dict(row) for row in rows]
 
+# === Sync Functions ===
+
+# sync_log entries older than this are pruned; clients with an older cursor resync
+SYNC_LOG_DAYS = int(os.environ.get("INTROS_SYNC_LOG_DAYS", "30"))
+
+def _sync_snapshot(c, bot_id: str) -> Dict[str, List[Dict]]:
+    """Current unread messages, pending requests and the user's accepted requests
+    (first sync, or a cursor the log can no longer serve)"""
+    c.execute('''
+        SELECT m.*, p.name AS from_name FROM messages m
+        LEFT JOIN profiles p ON p.bot_id = m.from_bot_id
+        WHERE m.to_bot_id = ? AND m.read = 0 ORDER BY m.id
+    ''', (bot_id,))
+    messages = [dict(row) for row in c.fetchall()]
+    c.execute('''
+        SELECT c.*, p.name, p.interests, p.looking_for, p.location FROM connections c
+        JOIN profiles p ON p.bot_id = c.from_bot_id
+        WHERE c.to_bot_id = ? AND c.status = 'pending' ORDER BY c.id
+    ''', (bot_id,))
+    requests = [dict(row) for row in c.fetchall()]
+    # State rather than events: lets a reset client see which of its requests resolved
+    c.execute('''
+        SELECT c.*, p.name, p.interests, p.telegram_handle FROM connections c
+        JOIN profiles p ON p.bot_id = c.to_bot_id
+        WHERE c.from_bot_id = ? AND c.status = 'accepted' ORDER BY c.id
+    ''', (bot_id,))
+    accepted = [dict(row) for row in c.fetchall()]
+    return {"messages": messages, "requests": requests, "accepted": accepted, "profiles": []}
+
+def _sync_rows(c, sql: str, ids: List[int]) -> List[Dict]:
+    if not ids:
+        return []
+    c.execute(sql.format(','.join('?' * len(ids))), ids)
+    return [dict(row) for row in c.fetchall()]
+
+def get_changes(bot_id: str, since: Optional[int] = None, limit: int = 100) -> Dict[str, Any]:
+    """Changes for a user after cursor `since`: new messages, incoming requests,
+    acceptances of their requests and profile updates of their connections.
+    Without a cursor, or with one older than the log or ahead of its head (the
+    database was restored or reset), returns a snapshot."""
+    conn = get_db()
+    c = conn.cursor()
+    # Read the head first: entries committed later get a higher seq, so none is skipped
+    c.execute("SELECT seq FROM sqlite_sequence WHERE name = 'sync_log'")
+    row = c.fetchone()
+    head = row[0] if row else 0
+
+    reset = False
+    if since is not None:
+        c.execute('SELECT MIN(seq) FROM sync_log')
+        oldest = c.fetchone()[0]
+        reset = since > head or (oldest is not None and since < oldest - 1)
+    if since is None or reset:
+        result = _sync_snapshot(c, bot_id)
+        conn.close()
+        return {"cursor": head, "has_more": False, "reset": reset, **result}
+
+    c.execute('''
+        SELECT seq, kind, ref_id FROM sync_log
+        WHERE bot_id = ? AND seq > ? AND seq <= ? ORDER BY seq LIMIT ?
+    ''', (bot_id, since, head, limit + 1))
+    entries = c.fetchall()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    ids = {"message": [], "request": [], "accepted": [], "profile": []}
+    for entry in entries:
+        if entry['ref_id'] not in ids[entry['kind']]:
+            ids[entry['kind']].append(entry['ref_id'])
+
+    result = {
+        "cursor": entries[-1]['seq'] if has_more else head,
+        "has_more": has_more,
+        "reset": False,
+        "messages": _sync_rows(c, '''
+            SELECT m.*, p.name AS from_name FROM messages m
+            LEFT JOIN profiles p ON p.bot_id = m.from_bot_id
+            WHERE m.id IN ({}) ORDER BY m.id''', ids["message"]),
+        # Requests already answered or expired are skipped
+        "requests": _sync_rows(c, '''
+            SELECT c.*, p.name, p.interests, p.looking_for, p.location FROM connections c
+            JOIN profiles p ON p.bot_id = c.from_bot_id
+            WHERE c.id IN ({}) AND c.status = 'pending' ORDER BY c.id''', ids["request"]),
+        "accepted": _sync_rows(c, '''
+            SELECT c.*, p.name, p.interests, p.telegram_handle FROM connections c
+            JOIN profiles p ON p.bot_id = c.to_bot_id
+            WHERE c.id IN ({}) AND c.status = 'accepted' ORDER BY c.id''', ids["accepted"]),
+        "profiles": _sync_rows(c, f'SELECT {PROFILE_PROJECTIONS["full"]} FROM profiles p WHERE p.id IN ({{}})',
+                               ids["profile"]),
+    }
+    conn.close()
+    return result
+
+def prune_sync_log(days: int = SYNC_LOG_DAYS) -> int:
+    """Delete sync_log entries older than `days`"""
+    conn = get_db()
+    c = conn.cursor()
+    cutoff = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+    # The newest entry is kept so MIN(seq) still shows how far the log was pruned
+    c.execute('''
+        DELETE FROM sync_log
+        WHERE created_at < ? AND seq < (SELECT MAX(seq) FROM sync_log)
+    ''', (cutoff,))
+    deleted = c.rowcount
+    conn.commit()
+    conn.close()
+    return deleted
+
 # === Limits Functions ===
 
-def get_daily_limits(bot_id: str) -> Dict:
-    """Get today's usage limits"""
+def get_limit_usage(bot_id: str, date: str) -> Dict:
+    """Load a user's quota tier and stored usage for a day"""
     conn = get_db()
     c = conn.cursor()
-    
-    today = datetime.now().strftime('%Y-%m-%d')
-    c.execute('SELECT * FROM daily_limits WHERE bot_id = ? AND date = ?', (bot_id, today))
+    c.execute('''
+        SELECT u.tier, d.profile_views, d.connection_requests
+        FROM users u
+        LEFT JOIN daily_limits d ON d.bot_id = u.bot_id AND d.date = ?
+        WHERE u.bot_id = ?
+    ''', (date, bot_id))
     row = c.fetchone()
     conn.close()
-    
-    if row:
-        return {
-            "profile_views": row["profile_views"],
-            "profile_views_limit": 10,
-            "connection_requests": row["connection_requests"],
-            "connection_requests_limit": 3
-        }
     return {
-        "profile_views": 0,
-        "profile_views_limit": 10,
-        "connection_requests": 0,
-        "connection_requests_limit": 3
+        "tier": (row["tier"] if row else None) or "free",
+        "profile_views": (row["profile_views"] if row else None) or 0,
+        "connection_requests": (row["connection_requests"] if row else None) or 0,
     }
 
-def check_limit(bot_id: str, limit_type: str) -> bool:
-    """Check if user is within limits"""
-    limits = get_daily_limits(bot_id)
-    if limit_type == 'profile_views':
-        return limits['profile_views'] < limits['profile_views_limit']
-    elif limit_type == 'connection_requests':
-        return limits['connection_requests'] < limits['connection_requests_limit']
-    return True
+def add_limit_usage(deltas: List[tuple]):
+    """Add (bot_id, date, profile_views, connection_requests) usage deltas in one transaction"""
+    if not deltas:
+        return
+    conn = get_db()
+    c = conn.cursor()
+    c.executemany('''
+        INSERT INTO daily_limits (bot_id, date, profile_views, connection_requests)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(bot_id, date) DO UPDATE SET
+            profile_views = profile_views + excluded.profile_views,
+            connection_requests = connection_requests + excluded.connection_requests
+    ''', deltas)
+    conn.commit()
+    conn.close()
+
+def set_user_tier(bot_id: str, tier: str) -> Dict:
+    """Set a user's quota tier"""
+    conn = get_db()
+    c = conn.cursor()
+    c.execute('UPDATE users SET tier = ? WHERE bot_id = ?', (tier, bot_id))
+    conn.commit()
+    affected = c.rowcount
+    conn.close()
+    if affected:
+        return {"success": True}
+    return {"success": False, "error": "User not found"}
+
+def consume_limit(bot_id: str, date: str, kind: str, amount: int,
+                  tier_limits: Dict[str, int], partial: bool = False) -> int:
+    """Atomically check and consume stored quota (shared by all workers).
+    tier_limits maps tier -> limit for this kind. Returns the amount granted."""
+    if kind not in ('profile_views', 'connection_requests'):
+        raise ValueError(f"Unknown limit type: {kind}")
+    conn = get_db()
+    c = conn.cursor()
+    c.execute('BEGIN IMMEDIATE')
+    # Any error must release the write lock at once, not when the connection is collected
+    try:
+        c.execute(f'''
+            SELECT u.tier, d.{kind}
+            FROM users u
+            LEFT JOIN daily_limits d ON d.bot_id = u.bot_id AND d.date = ?
+            WHERE u.bot_id = ?
+        ''', (date, bot_id))
+        row = c.fetchone()
+        tier = (row[0] if row else None) or 'free'
+        used = (row[1] if row else None) or 0
+        left = max(0, tier_limits.get(tier, tier_limits['free']) - used)
+        granted = min(amount, left) if partial else (amount if amount <= left else 0)
+        if granted:
+            c.execute(f'''
+                INSERT INTO daily_limits (bot_id, date, {kind}) VALUES (?, ?, ?)
+                ON CONFLICT(bot_id, date) DO UPDATE SET {kind} = {kind} + excluded.{kind}
+            ''', (bot_id, date, granted))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return granted
+
+# === Worker Coordination ===
+
+def acquire_lease(name: str, holder: str, ttl: float) -> bool:
+    """Take or renew a named lease for ttl seconds. True if holder owns it."""
+    now = time.time()
+    conn = get_db()
+    c = conn.cursor()
+    c.execute('''
+        INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?)
+        ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+        WHERE leases.holder = excluded.holder OR leases.expires_at < ?
+    ''', (name, holder, now + ttl, now))
+    acquired = c.rowcount == 1
+    conn.commit()
+    conn.close()
+    return acquired
+
+def release_lease(name: str, holder: str):
+    """Give up a lease so another worker can take it immediately"""
+    conn = get_db()
+    c = conn.cursor()
+    c.execute('DELETE FROM leases WHERE name = ? AND holder = ?', (name, holder))
+    conn.commit()
+    conn.close()
+
+def get_leases() -> List[Dict]:
+    """Current lease holders"""
+    conn = get_db()
+    c = conn.cursor()
+    c.execute('SELECT name, holder, expires_at FROM leases')
+    rows = c.fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
 
 # === Cleanup Functions ===
 
@@ -922,8 +1879,10 @@ def get_all_users() -> List[Dict]:
     conn = get_db()
     c = conn.cursor()
     
-    c.execute('''
-        SELECT u.*, p.name, p.interests, p.looking_for, p.location
+    # No api_key / verify_code: this list is rendered in the admin dashboard
+    c.execute(f'''
+        SELECT u.bot_id, u.telegram_id, u.verified, u.tier, u.created_at,
+               {PROFILE_PROJECTIONS["admin"]}
         FROM users u
         LEFT JOIN profiles p ON u.bot_id = p.bot_id
         ORDER BY u.created_at DESC
@@ -941,11 +1900,13 @@ def delete_user(bot_id: str) -> Dict:
     c.execute('DELETE FROM visitors WHERE visitor_bot_id = ? OR visited_bot_id = ?', (bot_id, bot_id))
     c.execute('DELETE FROM connections WHERE from_bot_id = ? OR to_bot_id = ?', (bot_id, bot_id))
     c.execute('DELETE FROM daily_limits WHERE bot_id = ?', (bot_id,))
+    c.execute('DELETE FROM sync_log WHERE bot_id = ?', (bot_id,))
     c.execute('DELETE FROM profiles WHERE bot_id = ?', (bot_id,))
     c.execute('DELETE FROM users WHERE bot_id = ?', (bot_id,))
     
     conn.commit()
     conn.close()
+    _invalidate_profile_caches()
     return {"success": True}
 
 # === Notification Functions ===
@@ -989,5 +1950,8 @@ def update_user_chat_id(telegram_id: str, chat_id: int):
     conn.commit()
     conn.close()
 
+# Time every public query function (exposed at /metrics)
+metrics.instrument_module(globals(), __name__, exclude=("get_db", "shared_connection", "release_shared"))
+
 # Initialize DB on import
 init_db()
@@ -0,0 +1,175 @@
+"""SQL statement profiling and slow-query log for Intros"""
+
+import functools
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+import metrics
+
+# Set INTROS_QUERY_PROFILING=0 to turn per-statement timing off
+ENABLED = os.environ.get("INTROS_QUERY_PROFILING", "1") != "0"
+
+# Statements slower than this (execute + fetch) go to the slow-query log
+SLOW_QUERY_MS = float(os.environ.get("INTROS_SLOW_QUERY_MS", "100"))
+# Defaults to slow_queries.log next to the database
+_DB_DIR = Path(os.environ.get("INTROS_DB_PATH", str(Path.home() / "intros" / "intros.db"))).parent
+SLOW_QUERY_LOG = Path(os.environ.get("INTROS_SLOW_QUERY_LOG", str(_DB_DIR / "slow_queries.log")))
+# Capture EXPLAIN QUERY PLAN for slow statements
+EXPLAIN_SLOW = os.environ.get("INTROS_EXPLAIN_SLOW", "1") != "0"
+
+# Distinct statements tracked; new ones beyond this are folded into "<other>"
+MAX_STATEMENTS = 500
+
+# sql -> [calls, total seconds, max seconds, rows]
+_stats = {}
+_lock = threading.Lock()
+_log_lock = threading.Lock()
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+
+@functools.lru_cache(maxsize=2048)
+def normalize(sql: str) -> str:
+    """Collapse whitespace and variable-length IN (?, ?, ...) lists so one
+    statement shape maps to one entry (memoized: statements come from a small set)"""
+    return _PLACEHOLDER_LIST.sub("?, ...", _WHITESPACE.sub(" ", sql).strip())
+
+def _record(key: str, elapsed: float, rows: int, new_call: bool, statement_elapsed: float):
+    with _lock:
+        entry = _stats.get(key)
+        if entry is None:
+            if len(_stats) >= MAX_STATEMENTS:
+                key = "<other>"
+                entry = _stats.setdefault(key, [0, 0.0, 0.0, 0])
+            else:
+                entry = _stats[key] = [0, 0.0, 0.0, 0]
+        if new_call:
+            entry[0] += 1
+        entry[1] += elapsed
+        entry[2] = max(entry[2], statement_elapsed)
+        entry[3] += rows
+
+def _caller() -> str:
+    """Name of the models.py function that issued the statement"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if code.co_filename.endswith("models.py") and code.co_name != "get_db":
+            return code.co_name
+        frame = frame.f_back
+    return "?"
+
+def _log_slow(conn, sql: str, params, elapsed: float):
+    entry = {
+        "ts": datetime.now().isoformat(timespec="milliseconds"),
+        "ms": round(elapsed * 1000, 2),
+        "caller": _caller(),
+        "sql": normalize(sql),
+        "params": len(params) if params is not None else 0,
+    }
+    if EXPLAIN_SLOW:
+        try:
+            plan = sqlite3.Cursor(conn).execute("EXPLAIN QUERY PLAN " + sql, params or ()).fetchall()
+            entry["plan"] = [row[3] for row in plan]
+        except sqlite3.Error:
+            pass
+    line = json.dumps(entry)
+    with _log_lock:
+        try:
+            with open(SLOW_QUERY_LOG, "a") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            print(f"Slow query log error: {e}")
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Cursor that times execute() plus the fetches that follow it"""
+
+    def execute(self, sql, params=()):
+        self._sql, self._params, self._elapsed, self._logged = sql, params, 0.0, False
+        self._key = normalize(sql)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            self._finish(time.perf_counter() - start, 0, True)
+
+    def executemany(self, sql, seq_of_params):
+        self._sql, self._params, self._elapsed, self._logged = sql, None, 0.0, False
+        self._key = normalize(sql)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_params)
+        finally:
+            self._finish(time.perf_counter() - start, 0, True)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._finish(time.perf_counter() - start, 1 if row is not None else 0, False)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(size if size is not None else self.arraysize)
+        self._finish(time.perf_counter() - start, len(rows), False)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._finish(time.perf_counter() - start, len(rows), False)
+        return rows
+
+    def _finish(self, elapsed: float, rows: int, new_call: bool):
+        sql = getattr(self, "_sql", None)
+        if sql is None:
+            return
+        self._elapsed += elapsed
+        _record(self._key, elapsed, rows, new_call, self._elapsed)
+        if not self._logged and self._elapsed * 1000 >= SLOW_QUERY_MS:
+            self._logged = True
+            _log_slow(self.connection, sql, self._params, self._elapsed)
+
+class ProfiledConnection(metrics.CountedConnection):
+    """Connection whose cursors (including conn.execute) are profiled"""
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+def connection_factory():
+    """sqlite3 connection class for get_db()"""
+    return ProfiledConnection if ENABLED else metrics.CountedConnection
+
+def top_statements(limit: int = 20, order_by: str = "total") -> List[Dict]:
+    """Statements ranked by total (or avg/max/calls) time"""
+    with _lock:
+        items = [(sql, list(entry)) for sql, entry in _stats.items()]
+    rows = [{
+        "sql": sql,
+        "calls": calls,
+        "total_ms": round(total * 1000, 2),
+        "avg_ms": round(total * 1000 / calls, 3) if calls else 0.0,
+        "max_ms": round(max_time * 1000, 2),
+        "rows": rows,
+    } for sql, (calls, total, max_time, rows) in items]
+    key = {"total": "total_ms", "avg": "avg_ms", "max": "max_ms", "calls": "calls"}.get(order_by, "total_ms")
+    rows.sort(key=lambda r: r[key], reverse=True)
+    return rows[:limit]
+
+def reset():
+    """Clear collected statement timings"""
+    with _lock:
+        _stats.clear()
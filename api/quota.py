@@ -0,0 +1,181 @@
+"""Daily quota engine for Intros: per-tier limits with in-memory counters"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict
+import metrics
+import models
+
+LIMIT_TYPES = ("profile_views", "connection_requests")
+
+# Per-tier daily quotas. Extra tiers (or overrides) come from INTROS_QUOTA_TIERS,
+# e.g. '{"pro": {"profile_views": 50, "connection_requests": 10}}'; limits a
+# tier leaves out are taken from "free"
+TIERS = {"free": {"profile_views": 10, "connection_requests": 3}}
+for _tier, _limits in json.loads(os.environ.get("INTROS_QUOTA_TIERS", "{}")).items():
+    _unknown = set(_limits) - set(LIMIT_TYPES)
+    if _unknown:
+        raise ValueError(f"INTROS_QUOTA_TIERS: unknown limit(s) {sorted(_unknown)} for tier {_tier!r}")
+    TIERS[_tier] = {**TIERS["free"], **{kind: int(n) for kind, n in _limits.items()}}
+
+# Seconds between write-backs of consumed quota to daily_limits
+FLUSH_INTERVAL = int(os.environ.get("INTROS_QUOTA_FLUSH_INTERVAL", "5"))
+
+# "memory" keeps counters in this process (one worker); "sqlite" checks and
+# consumes quota in the database so limits hold across several workers
+WORKERS = int(os.environ.get("INTROS_WORKERS", "1"))
+BACKEND = os.environ.get("INTROS_QUOTA_BACKEND") or ("sqlite" if WORKERS > 1 else "memory")
+
+# bot_id -> {"date", "tier", <limit type>: used}. Loaded from SQLite once per user per day.
+_counters = {}
+# (bot_id, date) -> {<limit type>: consumed since last flush}
+_pending = {}
+# Bumped when a flush takes its batch and again when the write is done (odd
+# while one is in flight), so a counter load can tell it raced with a flush
+_flush_seq = 0
+_lock = threading.Lock()
+
+metrics.Gauge("intros_quota_pending_writes", "Users with quota usage waiting to be flushed",
+              fn=lambda: len(_pending))
+metrics.Gauge("intros_quota_counters", "Users with an in-memory quota counter",
+              fn=lambda: len(_counters))
+
+def _today() -> str:
+    return datetime.now().strftime('%Y-%m-%d')
+
+def _tier_limits(tier: str) -> Dict[str, int]:
+    return TIERS.get(tier, TIERS["free"])
+
+@contextmanager
+def _counter(bot_id: str):
+    """Hold _lock with today's counter for a user, loading stored usage on first
+    use (day rollover included). The DB read happens outside the lock and is
+    retried if a flush was writing meanwhile, since its rows would be missed."""
+    today = _today()
+    while True:
+        with _lock:
+            counter = _counters.get(bot_id)
+            if counter is not None and counter["date"] == today:
+                yield counter
+                return
+            seq = _flush_seq
+        if seq % 2:
+            time.sleep(0.005)
+            continue
+        usage = models.get_limit_usage(bot_id, today)
+        with _lock:
+            counter = _counters.get(bot_id)
+            if _flush_seq == seq and (counter is None or counter["date"] != today):
+                pending = _pending.get((bot_id, today), {})
+                counter = {"date": today, "tier": usage["tier"]}
+                for kind in LIMIT_TYPES:
+                    counter[kind] = usage[kind] + pending.get(kind, 0)
+                _counters[bot_id] = counter
+
+def _limits_view(counter: Dict) -> Dict:
+    tier_limits = _tier_limits(counter["tier"])
+    return {
+        "profile_views": counter["profile_views"],
+        "profile_views_limit": tier_limits["profile_views"],
+        "connection_requests": counter["connection_requests"],
+        "connection_requests_limit": tier_limits["connection_requests"],
+        "tier": counter["tier"],
+    }
+
+def get_limits(bot_id: str) -> Dict:
+    """Get today's usage and limits"""
+    if BACKEND == "sqlite":
+        return _limits_view(models.get_limit_usage(bot_id, _today()))
+    with _counter(bot_id) as counter:
+        return _limits_view(counter)
+
+def remaining(bot_id: str, kind: str) -> int:
+    """How many of a limit type the user has left today"""
+    if BACKEND == "sqlite":
+        usage = models.get_limit_usage(bot_id, _today())
+        return max(0, _tier_limits(usage["tier"])[kind] - usage[kind])
+    with _counter(bot_id) as counter:
+        return max(0, _tier_limits(counter["tier"])[kind] - counter[kind])
+
+def check(bot_id: str, kind: str) -> bool:
+    """Check if user is within limits"""
+    return remaining(bot_id, kind) > 0
+
+def consume(bot_id: str, kind: str, amount: int = 1, partial: bool = False) -> int:
+    """Atomically check and consume quota. Returns the amount granted: all or
+    nothing, or as much as is left when partial=True."""
+    if amount <= 0:
+        return 0
+    if BACKEND == "sqlite":
+        tier_limits = {tier: limits[kind] for tier, limits in TIERS.items()}
+        return models.consume_limit(bot_id, _today(), kind, amount, tier_limits, partial)
+    with _counter(bot_id) as counter:
+        left = max(0, _tier_limits(counter["tier"])[kind] - counter[kind])
+        granted = min(amount, left) if partial else (amount if amount <= left else 0)
+        if granted:
+            counter[kind] += granted
+            pending = _pending.setdefault((bot_id, counter["date"]), {})
+            pending[kind] = pending.get(kind, 0) + granted
+        return granted
+
+def refund(bot_id: str, kind: str, amount: int = 1):
+    """Give back quota consumed for an action that did not happen"""
+    if BACKEND == "sqlite":
+        usage = {"profile_views": 0, "connection_requests": 0, kind: -amount}
+        models.add_limit_usage([(bot_id, _today(), usage["profile_views"], usage["connection_requests"])])
+        return
+    with _lock:
+        counter = _counters.get(bot_id)
+        if counter is None:
+            return
+        counter[kind] = max(0, counter[kind] - amount)
+        pending = _pending.setdefault((bot_id, counter["date"]), {})
+        pending[kind] = pending.get(kind, 0) - amount
+
+def forget(bot_id: str):
+    """Drop a user's counters and unflushed usage (account deleted or tier changed)"""
+    with _lock:
+        _counters.pop(bot_id, None)
+        for key in [k for k in _pending if k[0] == bot_id]:
+            del _pending[key]
+
+def flush():
+    """Write consumed quota back to daily_limits and drop counters from past days"""
+    global _flush_seq
+    with _lock:
+        _flush_seq += 1
+        batch = dict(_pending)
+        _pending.clear()
+        today = _today()
+        for bot_id in [b for b, counter in _counters.items() if counter["date"] != today]:
+            del _counters[bot_id]
+
+    deltas = [(bot_id, date, usage.get("profile_views", 0), usage.get("connection_requests", 0))
+              for (bot_id, date), usage in batch.items() if any(usage.values())]
+    try:
+        models.add_limit_usage(deltas)
+    except Exception:
+        # Put the deltas back so the next flush retries them
+        with _lock:
+            for key, usage in batch.items():
+                pending = _pending.setdefault(key, {})
+                for kind, n in usage.items():
+                    pending[kind] = pending.get(kind, 0) + n
+        raise
+    finally:
+        with _lock:
+            _flush_seq += 1
+
+async def start_flush_loop():
+    """Periodically write quota usage back to SQLite"""
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL)
+        try:
+            await asyncio.to_thread(flush)
+        except Exception as e:
+            print(f"Quota flush error: {e}")
@@ -0,0 +1,179 @@
+"""Rate limiting and backpressure middleware for Intros"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Dict
+import metrics
+
+# Requests per window per API key and per client IP. Windows are per process,
+# so with several workers each enforces its share of the limit.
+WORKERS = int(os.environ.get("INTROS_WORKERS", "1"))
+KEY_LIMIT = -(-int(os.environ.get("INTROS_RATE_LIMIT_KEY", "120")) // WORKERS)
+IP_LIMIT = -(-int(os.environ.get("INTROS_RATE_LIMIT_IP", "300")) // WORKERS)
+WINDOW_SECONDS = int(os.environ.get("INTROS_RATE_LIMIT_WINDOW", "60"))
+
+# Requests handled at once; extra requests wait (up to QUEUE_TIMEOUT seconds,
+# at most MAX_QUEUE of them) before being shed with 503
+MAX_CONCURRENCY = int(os.environ.get("INTROS_MAX_CONCURRENCY", "32"))
+MAX_QUEUE = int(os.environ.get("INTROS_MAX_QUEUE", "64"))
+QUEUE_TIMEOUT = float(os.environ.get("INTROS_QUEUE_TIMEOUT", "2"))
+
+# Only trust X-Forwarded-For when running behind a reverse proxy
+TRUST_PROXY = os.environ.get("INTROS_TRUST_PROXY", "") == "1"
+
+# Cheap liveness checks skip the concurrency limiter (still rate limited)
+UNQUEUED_PATHS = {"/health"}
+
+class SlidingWindow:
+    """Sliding-window counter: the previous fixed window is weighted by how much
+    of it still overlaps the sliding window. O(1) memory per client."""
+
+    def __init__(self, limit: int, window: int):
+        self.limit = limit
+        self.window = window
+        self.counts = {}  # key -> [window index, count, previous count]
+
+    def hit(self, key: str, now: float) -> float:
+        """Count a request. Returns 0 if allowed, else seconds until retry."""
+        index, into = divmod(now, self.window)
+        entry = self.counts.get(key)
+        if entry is None or entry[0] != index:
+            previous = entry[1] if entry is not None and entry[0] == index - 1 else 0
+            entry = self.counts[key] = [index, 0, previous]
+        estimate = entry[2] * (1 - into / self.window) + entry[1]
+        if estimate >= self.limit:
+            return self.window - into
+        entry[1] += 1
+        return 0
+
+    def prune(self, now: float):
+        """Forget clients idle for more than one full window"""
+        current = now // self.window
+        for key in [k for k, e in self.counts.items() if e[0] < current - 1]:
+            del self.counts[key]
+
+_stats = {
+    "allowed": 0,
+    "limited_key": 0,
+    "limited_ip": 0,
+    "shed": 0,
+    "in_flight": 0,
+    "queued": 0,
+    "peak_in_flight": 0,
+    "peak_queued": 0,
+}
+_key_windows = SlidingWindow(KEY_LIMIT, WINDOW_SECONDS)
+_ip_windows = SlidingWindow(IP_LIMIT, WINDOW_SECONDS)
+
+metrics.Gauge("intros_ratelimit", "Rate limiter counters and queue depth", ("stat",),
+              fn=lambda: _stats)
+
+def get_stats() -> Dict:
+    """Rate limiter and load-shedding counters"""
+    return {
+        **_stats,
+        "tracked_keys": len(_key_windows.counts),
+        "tracked_ips": len(_ip_windows.counts),
+        "key_limit": KEY_LIMIT,
+        "ip_limit": IP_LIMIT,
+        "window_seconds": WINDOW_SECONDS,
+        "max_concurrency": MAX_CONCURRENCY,
+        "max_queue": MAX_QUEUE,
+    }
+
+def _client_ip(scope) -> str:
+    if TRUST_PROXY:
+        for name, value in scope.get("headers", ()):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+def _api_key(scope) -> str:
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            return value.decode("latin-1").replace("Bearer ", "")
+    return ""
+
+async def _reject(send, status: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, int(retry_after + 0.999))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+class RateLimitMiddleware:
+    """Per-API-key and per-IP sliding-window limits (429), plus a global
+    concurrency limiter that sheds load with 503 when the queue is full."""
+
+    def __init__(self, app):
+        self.app = app
+        self.semaphore = None
+        self.requests_since_prune = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        now = time.monotonic()
+        self.requests_since_prune += 1
+        if self.requests_since_prune >= 1000:
+            self.requests_since_prune = 0
+            _key_windows.prune(now)
+            _ip_windows.prune(now)
+
+        retry = _ip_windows.hit(_client_ip(scope), now)
+        if retry:
+            _stats["limited_ip"] += 1
+            await _reject(send, 429, "Too many requests", retry)
+            return
+        api_key = _api_key(scope)
+        if api_key:
+            retry = _key_windows.hit(api_key, now)
+            if retry:
+                _stats["limited_key"] += 1
+                await _reject(send, 429, "Too many requests", retry)
+                return
+
+        if scope.get("path") in UNQUEUED_PATHS:
+            _stats["allowed"] += 1
+            await self.app(scope, receive, send)
+            return
+
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+        if self.semaphore.locked():
+            if _stats["queued"] >= MAX_QUEUE:
+                _stats["shed"] += 1
+                await _reject(send, 503, "Server busy, retry shortly", QUEUE_TIMEOUT)
+                return
+            _stats["queued"] += 1
+            _stats["peak_queued"] = max(_stats["peak_queued"], _stats["queued"])
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), QUEUE_TIMEOUT)
+            except asyncio.TimeoutError:
+                _stats["shed"] += 1
+                await _reject(send, 503, "Server busy, retry shortly", QUEUE_TIMEOUT)
+                return
+            finally:
+                _stats["queued"] -= 1
+        else:
+            await self.semaphore.acquire()
+
+        _stats["allowed"] += 1
+        _stats["in_flight"] += 1
+        _stats["peak_in_flight"] = max(_stats["peak_in_flight"], _stats["in_flight"])
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _stats["in_flight"] -= 1
+            self.semaphore.release()
@@ -3,9 +3,12 @@
 import asyncio
 import aiohttp
 import os
+import time
 from datetime import date
 from typing import Optional
+import metrics
 import models
+import quota
 
 VERIFY_BOT_TOKEN = os.environ.get("INTROS_VERIFY_BOT_TOKEN", "")
 if not VERIFY_BOT_TOKEN:
@@ -44,10 +47,13 @@ async def send_message(chat_id: int, text: str, reply_markup: dict = None) -> bo
             ) as resp:
                 data = await resp.json()
                 if data.get("ok"):
+                    metrics.telegram_sends.inc(1, "ok")
                     return True
+                metrics.telegram_sends.inc(1, "failed")
                 print(f"Telegram send failed: {data}")
                 return False
         except Exception as e:
+            metrics.telegram_sends.inc(1, "error")
             print(f"Error sending message: {e}")
             return False
 
@@ -132,6 +138,7 @@ _daily_nudge_sent = {}
 async def check_and_send_notifications():
     """Check all users for new notifications and send via Telegram"""
     users = models.get_notifiable_users()
+    metrics.notify_users.set(len(users))
 
     for user in users:
         bot_id = user["bot_id"]
@@ -198,7 +205,7 @@ async def check_and_send_notifications():
             # 4. Daily matches nudge (once per day)
             today = date.today().isoformat()
             if _daily_nudge_sent.get(bot_id) != today:
-                remaining = models.remaining_profile_views(bot_id)
+                remaining = quota.remaining(bot_id, "profile_views")
                 if remaining > 0:
                     text = f"🌟 Your daily matches are ready! You have {remaining} profile views today."
                     if not markup:
@@ -216,10 +223,12 @@ async def start_notification_loop():
     await asyncio.sleep(5)
 
     while True:
+        start = time.perf_counter()
         try:
             await check_and_send_notifications()
         except Exception as e:
             print(f"Notification loop error: {e}")
+        metrics.notify_cycle.observe(time.perf_counter() - start)
         await asyncio.sleep(NOTIFICATION_INTERVAL)
 
 if __name__ == "__main__":
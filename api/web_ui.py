@@ -1,8 +1,14 @@
 """Web UI routes for Intros - Complete Dashboard"""
 
 from fastapi import APIRouter, Request, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
+from collections import OrderedDict
+from typing import Optional
+import hashlib
 import models
+import os
+import quota
+import threading
 from datetime import datetime
 
 router = APIRouter()
@@ -491,12 +497,16 @@ async def admin_dashboard(token: str = None, tab: str = "overview"):
 '''
 
 # === User Profile Page ===
-@router.get("/u/{bot_id}", response_class=HTMLResponse)
-async def user_profile_page(bot_id: str, token: str = None):
-    # Get user
-    profile = models.get_profile(bot_id)
-    if not profile:
-        return '''
+
+# Rendered public pages per bot_id, valid while the user's version counter
+# (user_versions, bumped by triggers on every profile write in any worker) is
+# unchanged. Owner views are never cached. LRU-evicted.
+PROFILE_PAGE_CACHE_SIZE = int(os.environ.get("INTROS_PROFILE_PAGE_CACHE", "1024"))
+
+_page_cache = OrderedDict()
+_page_cache_lock = threading.Lock()
+
+PROFILE_NOT_FOUND = '''
 <!DOCTYPE html>
 <html><head><title>Profile Not Found</title></head>
 <body style="background:#0f0f1a;color:#888;display:flex;align-items:center;justify-content:center;height:100vh;font-family:sans-serif;">
@@ -507,20 +517,63 @@ async def user_profile_page(bot_id: str, token: str = None):
 </div>
 </body></html>
 '''
-    
+
+def invalidate_profile_page(bot_id: str):
+    """Drop a cached public page after the profile is written or deleted"""
+    with _page_cache_lock:
+        _page_cache.pop(bot_id, None)
+
+def _cached_profile_page(bot_id: str) -> Optional[tuple]:
+    """(html, etag) of the public page, rendered on a miss. None if no profile."""
+    version = models.get_user_version(bot_id)
+    if version is None:
+        invalidate_profile_page(bot_id)
+        return None
+    with _page_cache_lock:
+        entry = _page_cache.get(bot_id)
+        if entry is not None and entry[0] == version:
+            _page_cache.move_to_end(bot_id)
+            return entry[1], entry[2]
+
+    profile = models.get_profile(bot_id)
+    if not profile:
+        return None
+    html = _render_profile_page(bot_id, profile)
+    etag = f'"{hashlib.sha1(html.encode()).hexdigest()[:20]}"'
+    with _page_cache_lock:
+        _page_cache[bot_id] = (version, html, etag)
+        _page_cache.move_to_end(bot_id)
+        while len(_page_cache) > PROFILE_PAGE_CACHE_SIZE:
+            _page_cache.popitem(last=False)
+    return html, etag
+
+@router.get("/u/{bot_id}", response_class=HTMLResponse)
+async def user_profile_page(request: Request, bot_id: str, token: str = None):
     # Get additional data if this is the owner
-    is_owner = token and token.startswith(f"intros_") 
-    visitors = []
-    connections = []
-    requests = []
-    limits = {"profile_views": 0, "profile_views_limit": 10, "connection_requests": 0, "connection_requests_limit": 3}
-    
+    is_owner = token and token.startswith(f"intros_")
     if is_owner:
-        visitors = models.get_visitors(bot_id)
-        connections = models.get_connections(bot_id)
-        requests = models.get_pending_requests(bot_id)
-        limits = models.get_daily_limits(bot_id)
-    
+        view = models.get_owner_view(bot_id)
+        if not view:
+            return PROFILE_NOT_FOUND
+        return _render_profile_page(bot_id, view, quota.get_limits(bot_id))
+
+    # Anonymous visitors share one rendered page per profile
+    page = _cached_profile_page(bot_id)
+    if page is None:
+        return PROFILE_NOT_FOUND
+    html, etag = page
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(html, headers=headers)
+
+def _render_profile_page(bot_id: str, profile: dict, limits: dict = None) -> str:
+    """Profile page HTML; with limits, also the owner's lists from get_owner_view"""
+    is_owner = limits is not None
+    visitors = profile.get('visitors', [])
+    connections = profile.get('connections', [])
+    requests = profile.get('requests', [])
+
     # Build interests tags
     interests_html = ""
     if profile.get('interests'):
@@ -548,13 +601,13 @@ async def user_profile_page(bot_id: str, token: str = None):
     # Build connections list
     connections_html = ""
     for c in connections[:10]:
-        other = c.get('bot1_id') if c.get('bot1_id') != bot_id else c.get('bot2_id')
+        other = c.get('bot_id')
         connections_html += f'''
         <div class="connection-card">
             <div class="connection-avatar">{other[0].upper() if other else '?'}</div>
             <div>
                 <strong>{other}</strong>
-                <p style="color:#888;font-size:0.85em;">Connected {c.get('created_at', '')[:10] if c.get('created_at') else ''}</p>
+                <p style="color:#888;font-size:0.85em;">Connected {c.get('connected_at', '')[:10] if c.get('connected_at') else ''}</p>
             </div>
         </div>
         '''
@@ -0,0 +1,124 @@
+"""Cold-start time of intros.py commands.
+
+Runs each command as a fresh interpreter (as OpenClaw does on every bot turn)
+against a local stub API, for both HTTP transports, and reports the median
+wall time. Save a baseline and compare later runs; exits non-zero when a
+command gets slower than --threshold.
+
+    python benchmarks/cli_startup.py --save cli-baseline.json
+    python benchmarks/cli_startup.py --compare cli-baseline.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+CLI = Path(__file__).resolve().parent.parent / "intros" / "scripts" / "intros.py"
+
+# (name, argv) -- trivial commands first, then ones that make API calls
+COMMANDS = [
+    ("help", ["--help"]),
+    ("check-notifications", ["check-notifications"]),
+    ("web", ["web"]),
+    ("limits", ["limits"]),
+    ("search", ["search", "AI"]),
+]
+TRANSPORTS = ("requests", "stdlib")
+
+class StubAPI(BaseHTTPRequestHandler):
+    """Answers every request with an empty JSON object"""
+
+    def _reply(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_DELETE = _reply
+
+    def log_message(self, *args):
+        pass
+
+def time_command(argv: list, env: dict, runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, str(CLI)] + argv, env=env,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        samples.append(time.perf_counter() - start)
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "min_ms": round(min(samples) * 1000, 1),
+        "runs": runs,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="intros.py cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--save", help="Write results as a baseline JSON file")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Fail when a median is this much slower than the baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state_dir = tempfile.mkdtemp(prefix="intros-cli-")
+    data_dir = Path(state_dir) / "data" / "intros"
+    data_dir.mkdir(parents=True)
+    (data_dir / "config.json").write_text(json.dumps({"api_key": "intros_benchmark", "bot_id": "benchmark"}))
+
+    results = {}
+    try:
+        for transport in TRANSPORTS:
+            env = {
+                **os.environ,
+                "OPENCLAW_STATE_DIR": state_dir,
+                "INTROS_API_URL": f"http://127.0.0.1:{server.server_address[1]}",
+                "INTROS_HTTP_TRANSPORT": transport,
+            }
+            for name, argv in COMMANDS:
+                key = f"{name} [{transport}]"
+                results[key] = time_command(argv, env, args.runs)
+                print(f"{key:36s} {results[key]['median_ms']:>8.1f} ms  (min {results[key]['min_ms']:.1f})")
+    finally:
+        server.shutdown()
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, indent=2)
+        print(f"Saved {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = []
+        for key, current in results.items():
+            old = baseline.get(key)
+            if not old or not old["median_ms"]:
+                continue
+            change = current["median_ms"] / old["median_ms"] - 1
+            flag = "  REGRESSION" if change > args.threshold else ""
+            print(f"{key:36s} {old['median_ms']:>8.1f} -> {current['median_ms']:>8.1f} ms {change:>+6.0%}{flag}")
+            if flag:
+                regressions.append(key)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
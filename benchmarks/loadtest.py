@@ -0,0 +1,235 @@
+"""Load test for the Intros API on a synthetic database.
+
+Seeds a scratch database, then drives the FastAPI app in-process (ASGI
+transport) or under uvicorn, and reports throughput and p50/p95/p99 latency
+per endpoint plus the notification sweep. Results are saved as JSON; pass
+--compare with an earlier result to see the change.
+
+    python benchmarks/loadtest.py --users 10000 --requests 500 --out results.json
+    python benchmarks/loadtest.py --users 10000 --compare results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import seed as seeding
+
+ENDPOINTS = ("search", "recommend", "conversations", "messages", "profile")
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+def summarize(latencies: list, errors: int, wall: float) -> dict:
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "rps": round(len(values) / wall, 1) if wall else 0.0,
+        "mean_ms": round(sum(values) / len(values) * 1000, 2) if values else 0.0,
+        "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+    }
+
+def build_request(endpoint: str, rng: random.Random, users: int, partners: dict):
+    """(method, path, json body, api key) for one request"""
+    i = rng.randrange(users)
+    if endpoint == "search":
+        query = " ".join(rng.sample(seeding.INTERESTS, rng.randint(1, 2)))
+        return "POST", "/search", {"query": query, "limit": 10}, seeding.api_key(i)
+    if endpoint == "recommend":
+        return "GET", "/recommend?limit=10", None, seeding.api_key(i)
+    if endpoint == "conversations":
+        return "GET", "/conversations", None, seeding.api_key(i)
+    if endpoint == "messages":
+        i = rng.choice(list(partners))
+        return "GET", f"/messages/{partners[i]}?limit=50", None, seeding.api_key(i)
+    return "GET", f"/profile/{seeding.bot_id(rng.randrange(users))}", None, seeding.api_key(i)
+
+async def run_endpoint(client, endpoint: str, requests: int, concurrency: int,
+                       users: int, partners: dict, seed: int) -> dict:
+    rng = random.Random(f"{seed}-{endpoint}")
+    plan = [build_request(endpoint, rng, users, partners) for _ in range(requests)]
+    latencies, errors = [], 0
+    queue = iter(plan)
+
+    async def worker():
+        nonlocal errors
+        for method, path, body, key in queue:
+            start = time.perf_counter()
+            resp = await client.request(method, path, json=body, headers={"Authorization": f"Bearer {key}"})
+            elapsed = time.perf_counter() - start
+            if resp.status_code >= 400 and resp.status_code != 404:
+                errors += 1
+            else:
+                latencies.append(elapsed)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+async def run_sweeps(sweeps: int) -> dict:
+    """Time check_and_send_notifications with Telegram sends stubbed out"""
+    import telegram_verify
+
+    async def fake_send(chat_id, text, reply_markup=None):
+        return True
+    telegram_verify.send_message = fake_send
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(sweeps):
+        t = time.perf_counter()
+        await telegram_verify.check_and_send_notifications()
+        latencies.append(time.perf_counter() - t)
+    return summarize(latencies, 0, time.perf_counter() - start)
+
+def load_partners(db_path: str, sample: int = 1000) -> dict:
+    """A connected partner for a sample of users (for /messages/{id})"""
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT bot_id, other_bot_id FROM edges LIMIT ?", (sample,)).fetchall()
+    conn.close()
+    return {int(a.rsplit("_", 1)[1]): b for a, b in rows}
+
+def wait_for_server(url: str, server: subprocess.Popen, timeout: float = 30):
+    import httpx
+    deadline = time.time() + timeout
+    while time.time() < deadline and server.poll() is None:
+        try:
+            if httpx.get(f"{url}/health").status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("uvicorn did not start")
+
+async def run(args, env: dict, partners: dict) -> dict:
+    import httpx
+
+    server = None
+    if args.mode == "uvicorn":
+        url = f"http://127.0.0.1:{args.port}"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+            cwd=str(seeding.API_DIR), env={**os.environ, **env})
+        wait_for_server(url, server)
+        client = httpx.AsyncClient(base_url=url, timeout=60)
+    else:
+        import main
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench", timeout=60)
+
+    results = {}
+    try:
+        for endpoint in args.endpoints:
+            if endpoint == "messages" and not partners:
+                continue
+            results[endpoint] = await run_endpoint(
+                client, endpoint, args.requests, args.concurrency, args.users, partners, args.seed)
+            print(f"  {endpoint:14s} {json.dumps(results[endpoint])}")
+    finally:
+        await client.aclose()
+        if server:
+            server.terminate()
+            server.wait()
+
+    if args.sweeps:
+        results["notification_sweep"] = await run_sweeps(args.sweeps)
+        print(f"  {'sweep':14s} {json.dumps(results['notification_sweep'])}")
+    return results
+
+def compare(results: dict, baseline: dict):
+    print(f"\n{'endpoint':20s} {'p50':>16s} {'p95':>16s} {'rps':>16s}")
+    for name, current in results.items():
+        old = baseline.get("results", {}).get(name)
+        if not old:
+            continue
+        cells = []
+        for metric in ("p50_ms", "p95_ms", "rps"):
+            delta = (current[metric] - old[metric]) / old[metric] * 100 if old[metric] else 0.0
+            cells.append(f"{current[metric]:>8} ({delta:+.0f}%)")
+        print(f"{name:20s} {cells[0]:>16s} {cells[1]:>16s} {cells[2]:>16s}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Intros API load test")
+    parser.add_argument("--users", type=int, default=1000, help="Synthetic users (1k to 1M)")
+    parser.add_argument("--degree", type=int, default=5, help="Accepted connections started per user")
+    parser.add_argument("--messages", type=int, default=5, help="Average messages per connection")
+    parser.add_argument("--visits", type=int, default=5, help="Profile visits per user")
+    parser.add_argument("--notifiable", type=float, default=0.1,
+                        help="Fraction of users with a Telegram chat (notification sweep size)")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--endpoints", nargs="+", default=list(ENDPOINTS), choices=ENDPOINTS)
+    parser.add_argument("--sweeps", type=int, default=3, help="Notification sweeps to time (0 to skip)")
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--port", type=int, default=8765, help="Port for --mode uvicorn")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", help="Reuse a seeded directory (kept after the run)")
+    parser.add_argument("--out", help="Write JSON results here")
+    parser.add_argument("--compare", help="Baseline JSON results to compare against")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="intros-bench-")
+    env = seeding.prepare_env(workdir)
+    import models
+
+    seed_seconds = None
+    conn = models.get_db()
+    seeded = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    conn.close()
+    if seeded:
+        args.users = seeded
+        print(f"Reusing {seeded} users in {workdir}")
+    else:
+        print(f"Seeding {args.users} users in {workdir}...")
+        start = time.perf_counter()
+        counts = seeding.seed(args.users, args.degree, 1, args.messages, args.visits, args.notifiable, args.seed)
+        seed_seconds = round(time.perf_counter() - start, 2)
+        print(f"  {counts} in {seed_seconds}s")
+
+    partners = load_partners(str(models.DB_PATH))
+    print(f"Running {args.requests} requests/endpoint, concurrency {args.concurrency} ({args.mode})")
+    try:
+        results = asyncio.run(run(args, env, partners))
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "users": args.users,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mode": args.mode,
+            "seed": args.seed,
+            "seed_seconds": seed_seconds,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved {args.out}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Microbenchmarks for models.py hot paths, with saved baselines as a regression gate.
+
+Each benchmark is calibrated to run for roughly --min-time seconds per round;
+the median of --rounds rounds is compared against the baseline, and the run
+exits non-zero if any benchmark is slower by more than --threshold.
+--allocations also reports the peak memory allocated by one call.
+
+    python benchmarks/micro.py --save baseline.json
+    python benchmarks/micro.py --compare baseline.json --threshold 0.25
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import seed as seeding
+
+QUERIES = ["AI startups", "machine learning mumbai", '"open source" devops', "fin*",
+           "location:bangalore design", "climate investors", "robotcs", "product founder"]
+
+def measure(func, rounds: int, min_time: float) -> dict:
+    """Median/min seconds per call over `rounds` rounds of a calibrated loop count"""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 5 or loops >= 1 << 20:
+            break
+        loops *= 2
+    loops = max(1, int(loops * (min_time / max(elapsed, 1e-9))))
+
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - start) / loops)
+    return {
+        "median_us": round(statistics.median(samples) * 1e6, 2),
+        "min_us": round(min(samples) * 1e6, 2),
+        "stdev_us": round(statistics.stdev(samples) * 1e6, 2) if len(samples) > 1 else 0.0,
+        "loops": loops,
+        "rounds": rounds,
+    }
+
+def peak_allocation(func) -> float:
+    """KiB allocated at peak during one call, as traced by tracemalloc"""
+    func()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        func()
+        return round((tracemalloc.get_traced_memory()[1] - base) / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+def cycle(items):
+    """Callable returning the next item on each call"""
+    state = {"i": -1}
+
+    def next_item():
+        state["i"] = (state["i"] + 1) % len(items)
+        return items[state["i"]]
+    return next_item
+
+def build_benchmarks(users: int) -> dict:
+    """name -> zero-argument callable, on the seeded database"""
+    import models
+    import telegram_verify
+
+    async def fake_send(chat_id, text, reply_markup=None):
+        return True
+    telegram_verify.send_message = fake_send
+
+    viewers = [seeding.bot_id(i) for i in range(0, users, max(1, users // 50))]
+    next_viewer = cycle(viewers)
+    next_query = cycle(QUERIES)
+
+    conn = models.get_db()
+    seen = models._get_seen_bot_ids(viewers[0], conn)
+
+    def card_page():
+        c = models._card_cursor(conn, seen)
+        c.execute(f'SELECT {models.PROFILE_PROJECTIONS["card"]} FROM profiles p LIMIT 50')
+        return [card.to_dict() for card in c.fetchall()]
+
+    def search_page():
+        # A 50-result page through to the dicts the API serializes
+        result = models.search_profiles(query=next_query(), limit=50, viewer_bot_id=next_viewer())
+        return [card.to_dict() for card in result["results"]]
+
+    def search_cold():
+        models._invalidate_profile_caches()
+        models.search_profiles(query=next_query(), viewer_bot_id=next_viewer())
+
+    # Prime the sweep so later runs measure the steady state (nothing new to send)
+    asyncio.run(telegram_verify.check_and_send_notifications())
+    loop = asyncio.new_event_loop()
+
+    return {
+        "_sanitize_fts_query": lambda: models._sanitize_fts_query(next_query()),
+        "card_page": card_page,
+        "_get_seen_bot_ids": lambda: models._get_seen_bot_ids(next_viewer(), conn),
+        "search_profiles": lambda: models.search_profiles(query=next_query(), viewer_bot_id=next_viewer()),
+        "search_profiles_cold": search_cold,
+        "search_page_50": search_page,
+        "get_recommendations": lambda: models.get_recommendations(next_viewer()),
+        "get_conversations": lambda: models.get_conversations(next_viewer()),
+        "check_and_send_notifications": lambda: loop.run_until_complete(
+            telegram_verify.check_and_send_notifications()),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="models.py microbenchmarks")
+    parser.add_argument("--users", type=int, default=2000, help="Synthetic users to seed")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per round")
+    parser.add_argument("--only", nargs="+", help="Run only these benchmarks")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--allocations", action="store_true",
+                        help="Also record the peak KiB allocated per call")
+    parser.add_argument("--save", help="Write results as a baseline JSON file")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Fail when a median is this much slower than the baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="intros-micro-")
+    try:
+        seeding.prepare_env(workdir)
+        seeding.seed(args.users, notifiable=0.1, seed=args.seed)
+        benchmarks = build_benchmarks(args.users)
+        results = {}
+        for name, func in benchmarks.items():
+            if args.only and name not in args.only:
+                continue
+            results[name] = measure(func, args.rounds, args.min_time)
+            line = (f"{name:30s} {results[name]['median_us']:>12.2f} us  (min {results[name]['min_us']:.2f}, "
+                    f"{results[name]['loops']} loops)")
+            if args.allocations and name != "check_and_send_notifications":
+                results[name]["peak_kib"] = peak_allocation(func)
+                line += f"  {results[name]['peak_kib']:.1f} KiB peak"
+            print(line)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "meta": {
+                    "timestamp": datetime.now().isoformat(timespec="seconds"),
+                    "users": args.users,
+                    "python": platform.python_version(),
+                    "sqlite": sqlite3.sqlite_version,
+                },
+                "results": results,
+            }, f, indent=2)
+        print(f"Saved {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = []
+        print(f"\n{'benchmark':30s} {'baseline':>12s} {'current':>12s} {'change':>8s}")
+        for name, current in results.items():
+            old = baseline.get(name)
+            if not old:
+                continue
+            change = current["median_us"] / old["median_us"] - 1 if old["median_us"] else 0.0
+            flag = "  REGRESSION" if change > args.threshold else ""
+            alloc = ""
+            if "peak_kib" in old and "peak_kib" in current:
+                alloc = f"  {old['peak_kib']:.1f} -> {current['peak_kib']:.1f} KiB"
+            print(f"{name:30s} {old['median_us']:>12.2f} {current['median_us']:>12.2f} {change:>+7.0%}{flag}{alloc}")
+            if flag:
+                regressions.append(name)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Compare SQLite PRAGMA profiles (models.PRAGMA_PROFILES) on a seeded database.
+
+Runs the same read and write workloads under each profile and prints the
+median time per call, so profile changes can be justified with numbers.
+
+    python benchmarks/pragmas.py --users 20000
+    python benchmarks/pragmas.py --profiles safe default --extra '{"cache_size": -200000}'
+"""
+
+import argparse
+import json
+import shutil
+import tempfile
+
+import seed as seeding
+from micro import cycle, measure, QUERIES
+
+def workloads(users: int) -> dict:
+    import models
+
+    viewers = [seeding.bot_id(i) for i in range(0, users, max(1, users // 50))]
+    next_viewer = cycle(viewers)
+    next_query = cycle(QUERIES)
+    conn = models.get_db()
+    pairs = conn.execute("SELECT bot_id, other_bot_id FROM edges LIMIT 50").fetchall()
+    conn.close()
+    next_pair = cycle([tuple(p) for p in pairs])
+    counter = {"n": 0}
+
+    def search_cold():
+        models._invalidate_profile_caches()
+        models.search_profiles(query=next_query(), viewer_bot_id=next_viewer())
+
+    def send_message():
+        a, b = next_pair()
+        models.send_message(a, b, "benchmark message")
+
+    def mark_sent():
+        counter["n"] += 1
+        models.mark_notification_sent(next_viewer(), "benchmark", counter["n"])
+
+    return {
+        "search_profiles_cold": search_cold,
+        "get_recommendations": lambda: models.get_recommendations(next_viewer()),
+        "get_conversations": lambda: models.get_conversations(next_viewer()),
+        "send_message": send_message,
+        "mark_notification_sent": mark_sent,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite PRAGMA profile benchmark")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--profiles", nargs="+", help="Profiles to compare (default: all)")
+    parser.add_argument("--extra", help="JSON PRAGMA overrides benchmarked as profile 'custom'")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--out", help="Write JSON results here")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="intros-pragmas-")
+    try:
+        seeding.prepare_env(workdir)
+        import models
+        seeding.seed(args.users, notifiable=0.1)
+
+        profiles = {name: models._pragma_script(name) for name in (args.profiles or models.PRAGMA_PROFILES)}
+        if args.extra:
+            profiles["custom"] = models._pragma_script(models.PRAGMA_PROFILE, json.loads(args.extra))
+
+        results = {}
+        for name, script in profiles.items():
+            models._connection_pragmas = script
+            results[name] = {}
+            print(f"\n[{name}] {script}")
+            for workload, func in workloads(args.users).items():
+                results[name][workload] = measure(func, args.rounds, args.min_time)
+                print(f"  {workload:26s} {results[name][workload]['median_us']:>10.2f} us")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved {args.out}")
+
+if __name__ == "__main__":
+    main()
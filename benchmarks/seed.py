@@ -0,0 +1,147 @@
+"""Synthetic Intros data for benchmarks, written through the real models.py schema"""
+
+import json
+import os
+import random
+import sys
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parent.parent / "api"
+
+FIRST_NAMES = ["Aarav", "Priya", "Rohan", "Ananya", "Vikram", "Meera", "Arjun", "Kavya", "Ishaan",
+               "Diya", "Sam", "Alex", "Jordan", "Taylor", "Chen", "Yuki", "Omar", "Lena", "Marco", "Zoe"]
+LAST_NAMES = ["Sharma", "Patel", "Iyer", "Reddy", "Gupta", "Khan", "Das", "Nair", "Singh", "Mehta",
+              "Smith", "Garcia", "Kim", "Tanaka", "Muller", "Rossi", "Silva", "Cohen", "Novak", "Okafor"]
+INTERESTS = ["AI", "machine learning", "startups", "blockchain", "design", "product", "climate",
+             "fintech", "healthtech", "edtech", "robotics", "open source", "music", "photography",
+             "travel", "running", "chess", "writing", "gaming", "biotech", "saas", "marketing",
+             "investing", "crypto", "web3", "devops", "security", "data science", "ux research", "hardware"]
+LOOKING_FOR = ["co-founder", "investors", "mentors", "collaborators", "hiring", "friends",
+               "advisors", "beta testers", "job", "freelance work"]
+CITIES = ["Mumbai", "Bangalore", "Delhi", "Pune", "Hyderabad", "Chennai", "Kolkata", "Singapore",
+          "Dubai", "London", "Berlin", "San Francisco", "New York", "Toronto", "Sydney"]
+BIO_WORDS = ["building", "tools", "for", "teams", "passionate", "about", "scaling", "products",
+             "engineer", "founder", "curious", "learning", "shipping", "communities", "café",
+             "remote", "early", "stage", "data", "platform", "mobile", "apps", "research"]
+
+def prepare_env(workdir: str) -> dict:
+    """Point the API at a scratch database under workdir and lift per-user quotas
+    and rate limits. Must run before models/main are imported; returns the env
+    overrides so a uvicorn subprocess can reuse them."""
+    env = {
+        "INTROS_DB_PATH": os.path.join(workdir, "intros.db"),
+        "INTROS_QUOTA_TIERS": json.dumps({"free": {"profile_views": 10 ** 9, "connection_requests": 10 ** 9}}),
+        "INTROS_RATE_LIMIT_KEY": str(10 ** 9),
+        "INTROS_RATE_LIMIT_IP": str(10 ** 9),
+        "INTROS_VERIFY_BOT_TOKEN": os.environ.get("INTROS_VERIFY_BOT_TOKEN", "benchmark"),
+    }
+    os.environ.update(env)
+    if str(API_DIR) not in sys.path:
+        sys.path.insert(0, str(API_DIR))
+    return env
+
+def bot_id(i: int) -> str:
+    return f"bench_{i:07d}"
+
+def api_key(i: int) -> str:
+    return f"bench_key_{i:07d}"
+
+def _profile(rng: random.Random, i: int) -> tuple:
+    interests = ", ".join(rng.sample(INTERESTS, rng.randint(2, 4)))
+    looking_for = ", ".join(rng.sample(LOOKING_FOR, rng.randint(1, 2)))
+    bio = " ".join(rng.choice(BIO_WORDS) for _ in range(rng.randint(8, 15)))
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    return (bot_id(i), name, interests, looking_for, rng.choice(CITIES), bio)
+
+def _chunks(n: int, size: int = 10000):
+    for start in range(0, n, size):
+        yield range(start, min(n, start + size))
+
+def seed(users: int = 1000, degree: int = 5, pending: int = 1, messages: int = 5,
+         visits: int = 5, notifiable: float = 1.0, seed: int = 42) -> dict:
+    """Fill the (empty) database with users, profiles, accepted and pending
+    connections, messages and visitors. Returns row counts."""
+    import models
+
+    rng = random.Random(seed)
+    conn = models.get_db()
+    conn.execute("PRAGMA synchronous=OFF")
+    c = conn.cursor()
+    c.execute("SELECT COUNT(*) FROM users")
+    if c.fetchone()[0]:
+        conn.close()
+        raise RuntimeError("database already seeded; use a fresh --workdir")
+
+    for chunk in _chunks(users):
+        c.executemany(
+            "INSERT INTO users (bot_id, api_key, telegram_id, telegram_chat_id, verified) VALUES (?, ?, ?, ?, 1)",
+            [(bot_id(i), api_key(i), str(i), i + 1 if rng.random() < notifiable else None) for i in chunk])
+        profiles = [_profile(rng, i) for i in chunk]
+        c.executemany(
+            "INSERT INTO profiles (bot_id, name, interests, looking_for, location, bio) VALUES (?, ?, ?, ?, ?, ?)",
+            profiles)
+        tags = []
+        for i, p in zip(chunk, profiles):
+            # Profile ids follow insertion order on a fresh database
+            for field, value in zip(models.TAG_FIELDS, (p[2], p[3], p[4])):
+                tags.extend((field, tag, i + 1, label) for tag, label in models._split_tags(value).items())
+        c.executemany("INSERT INTO profile_tags (field, tag, profile_id, label) VALUES (?, ?, ?, ?)", tags)
+        conn.commit()
+
+    # Accepted connections: each user links to `degree` random others
+    pairs = set()
+    for i in range(users):
+        for _ in range(degree):
+            j = rng.randrange(users)
+            if j != i and (j, i) not in pairs:
+                pairs.add((i, j))
+    accepted = sorted(pairs)
+    c.executemany(
+        "INSERT OR IGNORE INTO connections (from_bot_id, to_bot_id, status, responded_at) "
+        "VALUES (?, ?, 'accepted', datetime('now'))",
+        [(bot_id(i), bot_id(j)) for i, j in accepted])
+    c.execute('''
+        INSERT OR IGNORE INTO edges (bot_id, other_bot_id, connection_id)
+        SELECT from_bot_id, to_bot_id, id FROM connections WHERE status = 'accepted'
+        UNION ALL
+        SELECT to_bot_id, from_bot_id, id FROM connections WHERE status = 'accepted'
+    ''')
+
+    # Pending requests between users who are not connected yet
+    requests = []
+    for i in range(users):
+        for _ in range(pending):
+            j = rng.randrange(users)
+            if j != i and (i, j) not in pairs and (j, i) not in pairs:
+                requests.append((bot_id(i), bot_id(j)))
+    c.executemany("INSERT OR IGNORE INTO connections (from_bot_id, to_bot_id) VALUES (?, ?)", requests)
+    conn.commit()
+
+    # Messages along accepted connections, older half read
+    rows = []
+    for i, j in accepted:
+        count = rng.randint(0, messages * 2)
+        for k in range(count):
+            frm, to = (i, j) if k % 2 == 0 else (j, i)
+            rows.append((bot_id(frm), bot_id(to), f"message {k} from {bot_id(frm)}", int(k < count // 2)))
+        if len(rows) >= 50000:
+            c.executemany("INSERT INTO messages (from_bot_id, to_bot_id, content, read) VALUES (?, ?, ?, ?)", rows)
+            rows = []
+    c.executemany("INSERT INTO messages (from_bot_id, to_bot_id, content, read) VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+
+    for chunk in _chunks(users):
+        c.executemany(
+            "INSERT INTO visitors (visitor_bot_id, visited_bot_id) VALUES (?, ?)",
+            [(bot_id(i), bot_id(rng.randrange(users))) for i in chunk for _ in range(visits)])
+    conn.commit()
+
+    counts = {}
+    for table in ("users", "profiles", "connections", "edges", "messages", "visitors", "profile_tags"):
+        c.execute(f"SELECT COUNT(*) FROM {table}")
+        counts[table] = c.fetchone()[0]
+    c.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    models._invalidate_profile_caches()
+    return counts
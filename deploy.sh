@@ -1,5 +1,17 @@
 #!/bin/bash
 
+# Usage: ./deploy.sh [--workers N]
+# With N > 1 workers, one of them (the lease holder) runs the Telegram bot and
+# notification loop, and daily quotas are enforced in SQLite.
+WORKERS=1
+while [ $# -gt 0 ]; do
+    case "$1" in
+        --workers) WORKERS="$2"; shift 2 ;;
+        --workers=*) WORKERS="${1#*=}"; shift ;;
+        *) echo "Unknown option: $1"; exit 1 ;;
+    esac
+done
+
 echo "=== Deploying Intros from GitHub ==="
 
 cd /root/intros
@@ -23,13 +35,14 @@ echo "✅ Skill synced"
 lsof -i :8080 2>/dev/null | awk "NR>1 {print \$2}" | xargs -r kill 2>/dev/null || true
 sleep 2
 cd /root/intros/api
-PYTHONUNBUFFERED=1 nohup python3 -m uvicorn main:app --host 0.0.0.0 --port 8080 > /tmp/intros.log 2>&1 &
+PYTHONUNBUFFERED=1 INTROS_WORKERS=$WORKERS nohup python3 -m uvicorn main:app --host 0.0.0.0 --port 8080 \
+    --workers $WORKERS > /tmp/intros.log 2>&1 &
 
 # Wait for API to be ready (up to 15s)
 for i in $(seq 1 15); do
     STATUS=$(curl -s -o /dev/null -w "%{http_code}" http://localhost:8080/health 2>/dev/null)
     if [ "$STATUS" = "200" ]; then
-        echo "✅ API restarted (ready in ${i}s)"
+        echo "✅ API restarted with $WORKERS worker(s) (ready in ${i}s)"
         break
     fi
     sleep 1
@@ -5,11 +5,17 @@ import argparse
 import json
 import os
 import sys
-import requests
+from contextlib import contextmanager
 from pathlib import Path
 
+# Heavy modules (requests, http.client, ...) are imported only when a command
+# actually talks to the API, so trivial commands start fast.
+
 # Configuration
-API_URL = "https://api.openbreeze.ai"
+API_URL = os.environ.get('INTROS_API_URL', "https://api.openbreeze.ai")
+# HTTP transport: "requests" (default, falls back to stdlib if not installed)
+# or "stdlib" (http.client only, no third-party imports)
+HTTP_TRANSPORT = os.environ.get('INTROS_HTTP_TRANSPORT', 'requests')
 # Cron notifications disabled — using @Intros_verify_bot push notifications instead
 CRON_NOTIFICATIONS_ENABLED = False
 
@@ -22,23 +28,71 @@ CONFIG_PATH = DATA_DIR / "config.json"
 # Legacy path (inside skill folder) — migrate if found
 _LEGACY_CONFIG = Path(STATE_DIR) / "skills" / "intros" / "config.json"
 
+# Parsed once per process; save_config() keeps it current
+_config = None
+
+def _write_json(path, data, sync=True, **dump_args):
+    """Write JSON atomically: a private temp file in the same directory, then rename.
+    Readers see the old or the new file, never a partial one."""
+    import tempfile
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, **dump_args)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+@contextmanager
+def _data_lock():
+    """Exclusive lock serializing config/identity writers that share this DATA_DIR"""
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    with open(DATA_DIR / ".lock", 'a') as lock:
+        try:
+            import fcntl
+        except ImportError:  # No flock on this platform; writes are still atomic
+            yield
+            return
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
 def load_config():
-    """Load saved configuration"""
-    # Migrate from legacy path (inside skill folder) to data dir
-    if not CONFIG_PATH.exists() and _LEGACY_CONFIG.exists():
-        DATA_DIR.mkdir(parents=True, exist_ok=True)
-        import shutil
-        shutil.move(str(_LEGACY_CONFIG), str(CONFIG_PATH))
-    if CONFIG_PATH.exists():
+    """Load saved configuration (read from disk once per process)"""
+    global _config
+    if _config is not None:
+        return _config
+    try:
         with open(CONFIG_PATH) as f:
-            return json.load(f)
+            _config = json.load(f)
+        return _config
+    except FileNotFoundError:
+        pass
+    # Migrate from legacy path (inside skill folder) to data dir
+    if _LEGACY_CONFIG.exists():
+        with _data_lock():
+            if not CONFIG_PATH.exists() and _LEGACY_CONFIG.exists():
+                import shutil
+                shutil.move(str(_LEGACY_CONFIG), str(CONFIG_PATH))
+        return load_config()
     return {}
 
 def save_config(config):
     """Save configuration"""
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    with open(CONFIG_PATH, 'w') as f:
-        json.dump(config, f, indent=2)
+    global _config
+    with _data_lock():
+        _write_json(CONFIG_PATH, config, indent=2)
+    _config = config
 
 def get_headers():
     """Get auth headers"""
@@ -49,28 +103,291 @@ def get_headers():
         sys.exit(1)
     return {"Authorization": f"Bearer {api_key}"}
 
+# Retries for 503 (server shedding load) and 429 with Retry-After (rate limited),
+# waiting at most HTTP_RETRY_MAX_WAIT seconds in total; a longer Retry-After is
+# returned to the caller (as retry_after) instead of slept through
+HTTP_RETRIES = 3
+HTTP_RETRY_MAX_WAIT = float(os.environ.get('INTROS_RETRY_MAX_WAIT', '5'))
+# Optional local daemon (`intros.py daemon start`) that keeps one warm keep-alive
+# connection across CLI invocations of this OpenClaw instance
+DAEMON_SOCKET = DATA_DIR / "daemon.sock"
+DAEMON_IDLE_TIMEOUT = int(os.environ.get('INTROS_DAEMON_IDLE', '600'))
+
+_in_daemon = False
+_session = None       # requests.Session (keep-alive, gzip)
+_connections = {}     # netloc -> [kept-alive http.client connection, last used]
+# Servers drop idle keep-alive connections (uvicorn after 5s). A request that is
+# not safe to resend never goes out on a connection idle longer than this.
+KEEPALIVE_REUSE_SECONDS = 4
+IDEMPOTENT_METHODS = ('GET', 'HEAD')
+
+def _send_stdlib(method, url, headers, body, timeout):
+    import http.client
+    import time
+    from urllib.parse import urlsplit
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else '')
+    headers = {**headers, 'Accept-Encoding': 'gzip'}
+    for attempt in range(2):
+        entry = _connections.get(parts.netloc)
+        if entry is not None and method not in IDEMPOTENT_METHODS \
+                and time.monotonic() - entry[1] > KEEPALIVE_REUSE_SECONDS:
+            entry[0].close()
+            entry = None
+        reused = entry is not None
+        if entry is None:
+            conn_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+            entry = _connections[parts.netloc] = [conn_class(parts.netloc, timeout=timeout), 0]
+        conn = entry[0]
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            resp = conn.getresponse()
+        except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+            conn.close()
+            del _connections[parts.netloc]
+            # The server closed the idle kept-alive connection before answering.
+            # Resend only idempotent requests: a POST may already have been applied.
+            if attempt or not reused or method not in IDEMPOTENT_METHODS:
+                raise
+            continue
+        try:
+            raw = resp.read()
+        except Exception:
+            conn.close()
+            del _connections[parts.netloc]
+            raise
+        entry[1] = time.monotonic()
+        resp_headers = {k.lower(): v for k, v in resp.getheaders()}
+        if resp_headers.get('content-encoding') == 'gzip':
+            import gzip
+            raw = gzip.decompress(raw)
+        return resp.status, resp_headers, raw
+
+def _send_requests(method, url, headers, body, timeout):
+    global _session
+    import requests
+    if _session is None:
+        _session = requests.Session()
+    resp = _session.request(method, url, headers=headers, data=body, timeout=timeout)
+    return resp.status_code, {k.lower(): v for k, v in resp.headers.items()}, resp.content
+
+def _send_daemon(method, url, headers, body, timeout):
+    import base64
+    reply = _daemon_request({
+        "method": method, "url": url, "headers": headers, "timeout": timeout,
+        "body": base64.b64encode(body).decode() if body is not None else None,
+    }, timeout + 5)
+    if 'error' in reply:
+        raise ConnectionError(reply['error'])
+    return reply['status'], reply['headers'], base64.b64decode(reply['body'])
+
+def _direct_transport():
+    if HTTP_TRANSPORT == 'requests':
+        try:
+            import requests  # noqa: F401
+            return _send_requests
+        except ImportError:
+            pass
+    return _send_stdlib
+
+def _send(method, url, headers, body, timeout):
+    """Send via the daemon when it is running, else directly"""
+    if not _in_daemon and DAEMON_SOCKET.exists():
+        try:
+            return _send_daemon(method, url, headers, body, timeout)
+        except (ConnectionRefusedError, FileNotFoundError):
+            # Stale socket left by a daemon that died
+            DAEMON_SOCKET.unlink(missing_ok=True)
+    return _direct_transport()(method, url, headers, body, timeout)
+
+def _retry_delay(attempt, retry_after):
+    """Seconds to wait before retrying: Retry-After if given, else exponential backoff with jitter"""
+    import random
+    try:
+        return max(float(retry_after), 0.0)
+    except (TypeError, ValueError):
+        return 0.5 * (2 ** attempt) + random.uniform(0, 0.25)
+
+# On-disk cache of GET responses that carry an ETag, revalidated with
+# If-None-Match; least recently used entries are evicted beyond this size
+HTTP_CACHE_DIR = DATA_DIR / "http_cache"
+HTTP_CACHE_MAX_BYTES = int(os.environ.get('INTROS_HTTP_CACHE_BYTES', str(1024 * 1024)))
+
+def _cache_path(url, headers):
+    import hashlib
+    # Keyed by URL and credentials, so a re-registered bot never sees stale data
+    key = f"{url}\n{headers.get('Authorization', '')}"
+    return HTTP_CACHE_DIR / (hashlib.sha1(key.encode()).hexdigest() + '.json')
+
+def _cache_load(path):
+    try:
+        with open(path) as f:
+            entry = json.load(f)
+        os.utime(path)  # Mark as recently used
+        return entry
+    except (OSError, ValueError):
+        return None
+
+def _cache_store(path, etag, raw):
+    try:
+        _write_json(path, {"etag": etag, "body": raw.decode('utf-8')}, sync=False)
+        _cache_evict()
+    except (OSError, UnicodeDecodeError):
+        pass
+
+def _cache_evict():
+    """Drop least recently used entries until the cache fits HTTP_CACHE_MAX_BYTES"""
+    entries = []
+    for entry in os.scandir(HTTP_CACHE_DIR):
+        st = entry.stat()
+        entries.append((st.st_mtime, st.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= HTTP_CACHE_MAX_BYTES:
+            break
+        os.unlink(path)
+        total -= size
+
+def http_request(method, endpoint, data=None, params=None, headers=None, timeout=30):
+    """Send a request to the API and return (status, parsed JSON body).
+    Retries with backoff on 503 and rate-limit 429s; GETs are revalidated
+    against the on-disk cache. Raises OSError if the server can't be reached."""
+    import time
+    url = f"{API_URL}{endpoint}"
+    if params:
+        from urllib.parse import urlencode
+        url += '?' + urlencode(params)
+    headers = dict(headers or {})
+    body = None
+    if data is not None:
+        body = json.dumps(data).encode()
+        headers['Content-Type'] = 'application/json'
+
+    cached = cache_path = None
+    if method == 'GET':
+        cache_path = _cache_path(url, headers)
+        cached = _cache_load(cache_path)
+        if cached:
+            headers['If-None-Match'] = cached['etag']
+
+    waited = 0.0
+    for attempt in range(HTTP_RETRIES + 1):
+        status, resp_headers, raw = _send(method, url, headers, body, timeout)
+        retry_after = resp_headers.get('retry-after')
+        # Quota 429s (daily limits) carry no Retry-After and are not retried
+        if attempt < HTTP_RETRIES and (status == 503 or (status == 429 and retry_after)):
+            delay = _retry_delay(attempt, retry_after)
+            if waited + delay <= HTTP_RETRY_MAX_WAIT:
+                # stderr, so commands' JSON on stdout stays parseable
+                print(f"Server returned {status}, retrying in {delay:.1f}s...", file=sys.stderr)
+                time.sleep(delay)
+                waited += delay
+                continue
+        break
+    if status == 304 and cached:
+        return 200, json.loads(cached['body'])
+    if cache_path and status == 200 and resp_headers.get('etag'):
+        _cache_store(cache_path, resp_headers['etag'], raw)
+    try:
+        result = json.loads(raw)
+    except ValueError:
+        result = {"detail": raw.decode('utf-8', 'replace')}
+    if status in (429, 503) and resp_headers.get('retry-after') and isinstance(result, dict):
+        result.setdefault('retry_after', resp_headers['retry-after'])
+    return status, result
+
+def _daemon_request(request, timeout=5):
+    """Send one JSON request line to the daemon and read one JSON reply line"""
+    import socket
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(DAEMON_SOCKET))
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    return json.loads(data)
+
+def _run_daemon():
+    """Serve CLI requests over DAEMON_SOCKET with one warm connection until idle"""
+    global _in_daemon
+    import base64
+    import socketserver
+    import time
+    _in_daemon = True
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    DAEMON_SOCKET.unlink(missing_ok=True)
+    state = {"last_used": time.monotonic(), "stop": False}
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            request = json.loads(self.rfile.readline())
+            state["last_used"] = time.monotonic()
+            if request.get('op') == 'stop':
+                state["stop"] = True
+                reply = {"stopped": True}
+            elif request.get('op') == 'status':
+                reply = {"running": True, "pid": os.getpid(), "api_url": API_URL}
+            else:
+                try:
+                    body = base64.b64decode(request['body']) if request.get('body') else None
+                    status, headers, raw = _direct_transport()(
+                        request['method'], request['url'], request['headers'], body, request.get('timeout', 30))
+                    reply = {"status": status, "headers": headers, "body": base64.b64encode(raw).decode()}
+                except OSError as e:
+                    reply = {"error": str(e)}
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+    # Socket is private to this user (it forwards authenticated requests)
+    old_umask = os.umask(0o177)
+    try:
+        server = socketserver.UnixStreamServer(str(DAEMON_SOCKET), Handler)
+    finally:
+        os.umask(old_umask)
+    server.timeout = 5
+    try:
+        while not state["stop"] and time.monotonic() - state["last_used"] < DAEMON_IDLE_TIMEOUT:
+            server.handle_request()
+    finally:
+        server.server_close()
+        DAEMON_SOCKET.unlink(missing_ok=True)
+
 def api_call(method, endpoint, data=None, params=None):
     """Make API call"""
-    url = f"{API_URL}{endpoint}"
     headers = get_headers() if endpoint not in ['/register', '/health'] else {}
-    
+
     try:
-        if method == 'GET':
-            resp = requests.get(url, headers=headers, params=params, timeout=30)
-        elif method == 'POST':
-            resp = requests.post(url, headers=headers, json=data, timeout=30)
-        elif method == 'DELETE':
-            resp = requests.delete(url, headers=headers, timeout=30)
-        
-        if resp.status_code == 200:
-            return resp.json()
+        status, result = http_request(method, endpoint, data, params, headers)
+        if status == 200:
+            return result
         else:
-            return {"error": resp.json().get('detail', resp.text)}
-    except requests.exceptions.ConnectionError:
+            return {"error": result.get('detail', result) if isinstance(result, dict) else result}
+    except OSError:
         return {"error": "Cannot connect to Intros server"}
     except Exception as e:
         return {"error": str(e)}
 
+def api_batch(calls):
+    """Run several API calls in one round trip via /batch.
+    calls: list of (method, endpoint) or (method, endpoint, data). Returns one
+    api_call-style result per call; falls back to separate calls on servers
+    without /batch."""
+    specs = [{"method": c[0], "path": c[1], "body": c[2] if len(c) > 2 else None} for c in calls]
+    try:
+        status, result = http_request('POST', '/batch', {"requests": specs}, headers=get_headers())
+    except OSError:
+        return [{"error": "Cannot connect to Intros server"} for _ in calls]
+    if status == 404:
+        return [api_call(*c) for c in calls]
+    if status != 200:
+        error = result.get('detail', result) if isinstance(result, dict) else result
+        return [{"error": error} for _ in calls]
+    return [r['body'] if r['status'] == 200 else {"error": r['body'].get('detail', r['body'])}
+            for r in result['responses']]
+
 # === Input Validation ===
 
 def validate_bot_id(bot_id):
@@ -85,10 +402,8 @@ def validate_bot_id(bot_id):
 
 def _save_identity(bot_id, telegram_id):
     """Save minimal identity to DATA_DIR for auto-recovery after reinstall."""
-    identity_file = DATA_DIR / "identity.json"
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    with open(identity_file, 'w') as f:
-        json.dump({"bot_id": bot_id, "telegram_id": telegram_id}, f)
+    with _data_lock():
+        _write_json(DATA_DIR / "identity.json", {"bot_id": bot_id, "telegram_id": telegram_id})
 
 def _load_identity():
     """Load saved identity for auto-recovery."""
@@ -108,9 +423,8 @@ def _try_auto_recover():
         return False
     try:
         body = {"bot_id": bot_id, "telegram_id": telegram_id}
-        resp = requests.post(f"{API_URL}/register", json=body, timeout=30)
-        result = resp.json()
-        if resp.status_code == 200 and result.get('success'):
+        status, result = http_request('POST', '/register', body)
+        if status == 200 and result.get('success'):
             config = {"api_key": result['api_key'], "bot_id": bot_id, "verify_code": result['verify_code']}
             save_config(config)
             return True
@@ -150,15 +464,13 @@ def cmd_register(args):
 
     telegram_id = args.telegram_id or os.environ.get('TELEGRAM_USER_ID', '')
 
-    url = f"{API_URL}/register"
     try:
         body = {"bot_id": bot_id, "telegram_id": telegram_id}
         if args.bot_username:
             body["openclaw_bot_username"] = args.bot_username.lstrip('@')
-        resp = requests.post(url, json=body, timeout=30)
-        result = resp.json()
+        status, result = http_request('POST', '/register', body)
 
-        if resp.status_code == 200 and result.get('success'):
+        if status == 200 and result.get('success'):
             config['api_key'] = result['api_key']
             config['bot_id'] = bot_id
             config['verify_code'] = result['verify_code']
@@ -225,13 +537,15 @@ def cmd_search(args):
     if args.query:
         data['query'] = ' '.join(args.query)
 
-    # Legacy filters (backward compat)
+    # Field filters: AND across fields, comma-separated values match any
     if args.interests:
         data['interests'] = args.interests
     if args.looking_for:
         data['looking_for'] = args.looking_for
     if args.location:
         data['location'] = args.location
+    if args.facets:
+        data['facets'] = True
 
     # Pagination (3 per page for chat-based UI)
     page = max(1, args.page)
@@ -245,13 +559,21 @@ def cmd_search(args):
 
     print(json.dumps(result))
 
+def cmd_suggest(args):
+    """Autocomplete interests, looking for and location values (doesn't use daily views)"""
+    result = api_call('GET', '/search/suggest', params={'q': ' '.join(args.prefix)})
+    print(json.dumps(result))
+
 def cmd_recommend(args):
     """Get profile recommendations based on your profile"""
     page = max(1, args.page)
     limit = 3
     offset = (page - 1) * limit
 
-    result = api_call('GET', '/recommend', params={'limit': limit, 'offset': offset})
+    params = {'limit': limit, 'offset': offset}
+    if args.network:
+        params['mode'] = 'network'
+    result = api_call('GET', '/recommend', params=params)
 
     if result.get('has_more'):
         result['hint'] = f"More results available. Use --page {page + 1} to see next page."
@@ -393,35 +715,48 @@ def cmd_check_notifications(args):
         else:
             return  # Not registered, skip silently
 
-    # === Check for new messages ===
-    msg_result = api_call('GET', '/unread-messages')
-    if 'error' not in msg_result:
-        messages = msg_result.get('messages', [])
-
-        # Load previously seen message IDs
-        seen_msg_file = DATA_DIR / "seen_messages.json"
-        seen_msg_ids = set()
-        if seen_msg_file.exists():
-            with open(seen_msg_file) as f:
-                seen_msg_ids = set(json.load(f))
-
-        # Find new messages
-        new_messages = []
-        current_msg_ids = set()
-        for msg in messages:
-            msg_id = str(msg.get('id'))
-            current_msg_ids.add(msg_id)
-            if msg_id not in seen_msg_ids:
-                new_messages.append(msg)
-
-        # Save current IDs as seen (only current, old ones cleared when read)
-        if current_msg_ids:
-            with open(seen_msg_file, 'w') as f:
-                json.dump(list(current_msg_ids), f)
-
-        # Notify about new messages
-        for msg in new_messages:
-            name = msg.get('name', msg.get('from_bot_id', 'Someone'))
+    # One round trip: changes since the saved cursor (+ limits for the daily nudge)
+    from datetime import date
+    nudge_file = DATA_DIR / "last_nudge.txt"
+    cursor_file = DATA_DIR / "sync_cursor.json"
+    today = date.today().isoformat()
+    last_nudge = nudge_file.read_text().strip() if nudge_file.exists() else ""
+    try:
+        with open(cursor_file) as f:
+            cursor = json.load(f).get('cursor')
+    except (OSError, ValueError):
+        cursor = None
+    calls = [('GET', '/sync' if cursor is None else f'/sync?since={cursor}')]
+    if last_nudge != today:
+        calls.append(('GET', '/limits'))
+    changes, *limits_result = api_batch(calls)
+
+    # Until the first cursor is saved, skip what the old seen_*.json files
+    # already notified (the first /sync is a snapshot)
+    legacy_files = {kind: DATA_DIR / f"seen_{kind}.json" for kind in ("messages", "requests", "accepted")}
+    seen = {}
+    if cursor is None:
+        for kind, path in legacy_files.items():
+            try:
+                with open(path) as f:
+                    seen[kind] = {str(i) for i in json.load(f)}
+            except (OSError, ValueError):
+                pass
+    synced = False
+
+    snapshot = True if cursor is None else changes.get('reset', False)
+    while 'error' not in changes:
+        for kind in seen:
+            changes[kind] = [item for item in changes.get(kind, []) if str(item.get('id')) not in seen[kind]]
+        # A snapshot lists every accepted request; only deltas are new acceptances
+        if snapshot and 'accepted' not in seen:
+            changes['accepted'] = []
+
+        # === New messages ===
+        for msg in changes.get('messages', []):
+            if msg.get('read'):
+                continue
+            name = msg.get('from_name') or msg.get('from_bot_id', 'Someone')
             content = msg.get('content', '')
             from_id = msg.get('from_bot_id', '')
 
@@ -430,34 +765,8 @@ def cmd_check_notifications(args):
             notification += f"Reply with: message send {from_id} \"your reply\""
             print(notification)
 
-    # === Check for new incoming requests ===
-    result = api_call('GET', '/requests')
-    if 'error' not in result:
-        requests_list = result.get('requests', [])
-
-        # Load previously seen request IDs
-        seen_file = DATA_DIR / "seen_requests.json"
-        seen_ids = set()
-        if seen_file.exists():
-            with open(seen_file) as f:
-                seen_ids = set(json.load(f))
-
-        # Find new requests
-        new_requests = []
-        current_ids = set()
-        for req in requests_list:
-            req_id = str(req.get('id'))
-            current_ids.add(req_id)
-            if req_id not in seen_ids:
-                new_requests.append(req)
-
-        # Save current IDs as seen
-        if current_ids or seen_ids:
-            with open(seen_file, 'w') as f:
-                json.dump(list(current_ids), f)
-
-        # Notify about new requests
-        for req in new_requests:
+        # === New incoming requests ===
+        for req in changes.get('requests', []):
             name = req.get('name', req.get('from_bot_id', 'Someone'))
             interests = req.get('interests', '')
             location = req.get('location', '')
@@ -471,35 +780,9 @@ def cmd_check_notifications(args):
             notification += f"\nSay 'accept {req.get('from_bot_id')}' or 'decline {req.get('from_bot_id')}'"
             print(notification)
 
-    # === Check for accepted connections ===
-    accepted_result = api_call('GET', '/accepted-connections')
-    if 'error' not in accepted_result:
-        accepted_list = accepted_result.get('connections', [])
-
-        # Load previously seen accepted IDs
-        seen_accepted_file = DATA_DIR / "seen_accepted.json"
-        seen_accepted_ids = set()
-        if seen_accepted_file.exists():
-            with open(seen_accepted_file) as f:
-                seen_accepted_ids = set(json.load(f))
-
-        # Find newly accepted
-        new_accepted = []
-        current_accepted_ids = set()
-        for conn in accepted_list:
-            conn_id = str(conn.get('id'))
-            current_accepted_ids.add(conn_id)
-            if conn_id not in seen_accepted_ids:
-                new_accepted.append(conn)
-
-        # Save current IDs as seen
-        if current_accepted_ids or seen_accepted_ids:
-            with open(seen_accepted_file, 'w') as f:
-                json.dump(list(current_accepted_ids), f)
-
-        # Notify about accepted connections
-        for conn in new_accepted:
-            name = conn.get('name', conn.get('bot_id', 'Someone'))
+        # === Accepted connections ===
+        for conn in changes.get('accepted', []):
+            name = conn.get('name', conn.get('to_bot_id', 'Someone'))
             telegram = conn.get('telegram_handle', '')
 
             notification = f"✅ Connection accepted!\n\n"
@@ -509,24 +792,76 @@ def cmd_check_notifications(args):
             notification += f"\nYou can now message each other!"
             print(notification)
 
-    # === Daily matches nudge (once per day) ===
-    from datetime import date
-    nudge_file = DATA_DIR / "last_nudge.txt"
-    today = date.today().isoformat()
-    last_nudge = ""
-    if nudge_file.exists():
-        last_nudge = nudge_file.read_text().strip()
+        with _data_lock():
+            _write_json(cursor_file, {"cursor": changes['cursor']})
+        synced = True
+        if not changes.get('has_more'):
+            break
+        changes = api_call('GET', '/sync', params={"since": changes['cursor']})
+        snapshot = changes.get('reset', False)
 
-    if last_nudge != today:
+    # Superseded once a cursor is saved; kept while /sync fails (e.g. an older server)
+    if synced:
+        for path in legacy_files.values():
+            path.unlink(missing_ok=True)
+
+    # === Daily matches nudge (once per day) ===
+    if limits_result:
         # Check remaining views
-        limits_result = api_call('GET', '/limits')
+        limits_result = limits_result[0]
         if 'error' not in limits_result:
             remaining = limits_result.get('profile_views_limit', 10) - limits_result.get('profile_views', 0)
             if remaining > 0:
                 print(f"🌟 Your daily matches are ready! You have {remaining} profile views today.\n\nSay 'recommend' to discover new people.")
                 nudge_file.write_text(today)
 
+def cmd_batch(args):
+    """Run several API calls in one round trip"""
+    if args.json:
+        specs = json.loads(sys.stdin.read() if args.json == '-' else args.json)
+        calls = [(c.get('method', 'GET'), c['path'], c.get('body')) for c in specs]
+    else:
+        calls = [('GET', path) for path in args.paths]
+    if not calls:
+        print(json.dumps({"error": "Give endpoint paths or --json"}, indent=2))
+        return
+    results = api_batch(calls)
+    print(json.dumps([{"call": f"{c[0]} {c[1]}", "result": r} for c, r in zip(calls, results)], indent=2))
+
+def cmd_daemon(args):
+    """Start/stop the local keep-alive daemon that CLI calls route through"""
+    import subprocess
+    import time
+    if args.daemon_cmd == 'run':
+        _run_daemon()
+        return
+    try:
+        status = _daemon_request({"op": args.daemon_cmd if args.daemon_cmd == 'stop' else 'status'})
+    except (OSError, ValueError):
+        status = None
+    if args.daemon_cmd == 'start':
+        if status:
+            print(json.dumps({"success": True, "message": "Daemon already running", **status}, indent=2))
+            return
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), 'daemon', 'run'],
+                         stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                         start_new_session=True)
+        for _ in range(50):
+            if DAEMON_SOCKET.exists():
+                print(json.dumps({"success": True, "message": "Daemon started", "socket": str(DAEMON_SOCKET)}, indent=2))
+                return
+            time.sleep(0.1)
+        print(json.dumps({"success": False, "error": "Daemon did not start"}, indent=2))
+    elif args.daemon_cmd == 'stop':
+        print(json.dumps({"success": True, "message": "Daemon stopped" if status else "Daemon not running"}, indent=2))
+    else:
+        print(json.dumps(status or {"running": False}, indent=2))
+
 def main():
+    # Fast path: the cron no-op shouldn't pay for building the full parser
+    if sys.argv[1:] == ['check-notifications'] and not CRON_NOTIFICATIONS_ENABLED:
+        return
+
     parser = argparse.ArgumentParser(description='Intros CLI')
     subparsers = parser.add_subparsers(dest='command', help='Commands')
     
@@ -560,14 +895,20 @@ def main():
     # Search
     search_parser = subparsers.add_parser('search', help='Search profiles')
     search_parser.add_argument('query', nargs='*', help='Free-text search (e.g., "AI engineer Mumbai")')
-    search_parser.add_argument('--interests', help='Filter by interests (legacy)')
-    search_parser.add_argument('--looking-for', help='Filter by looking for (legacy)')
-    search_parser.add_argument('--location', help='Filter by location (legacy)')
+    search_parser.add_argument('--interests', help='Filter by interests (comma separated, any match)')
+    search_parser.add_argument('--looking-for', help='Filter by looking for (comma separated, any match)')
+    search_parser.add_argument('--location', help='Filter by location (comma separated, any match)')
+    search_parser.add_argument('--facets', action='store_true', help='Include facet counts (e.g. AI (120), Mumbai (40))')
     search_parser.add_argument('--page', type=int, default=1, help='Page number (default: 1)')
 
+    # Suggest
+    suggest_parser = subparsers.add_parser('suggest', help='Autocomplete search terms (free)')
+    suggest_parser.add_argument('prefix', nargs='+', help='Start of an interest, goal or location')
+
     # Recommend
     recommend_parser = subparsers.add_parser('recommend', help='Get recommended profiles based on yours')
     recommend_parser.add_argument('--page', type=int, default=1, help='Page number (default: 1)')
+    recommend_parser.add_argument('--network', action='store_true', help='Recommend friends of your connections')
     
     # Visitors
     subparsers.add_parser('visitors', help='See who viewed your profile')
@@ -615,6 +956,15 @@ def main():
     # Setup (register cron job)
     subparsers.add_parser('setup', help='Setup notifications (run once after install)')
 
+    # Batch
+    batch_parser = subparsers.add_parser('batch', help='Run several API calls in one round trip')
+    batch_parser.add_argument('paths', nargs='*', help='GET endpoints, e.g. /requests /limits')
+    batch_parser.add_argument('--json', help='JSON list of {"method", "path", "body"} calls ("-" reads stdin)')
+
+    # Daemon (optional keep-alive connection shared across invocations)
+    daemon_parser = subparsers.add_parser('daemon', help='Manage the local keep-alive daemon')
+    daemon_parser.add_argument('daemon_cmd', choices=['start', 'stop', 'status', 'run'])
+
     args = parser.parse_args()
     
     if args.command == 'register':
@@ -657,12 +1007,18 @@ def main():
             cmd_message_list(args)
         else:
             msg_parser.print_help()
+    elif args.command == 'suggest':
+        cmd_suggest(args)
     elif args.command == 'recommend':
         cmd_recommend(args)
     elif args.command == 'check-notifications':
         cmd_check_notifications(args)
     elif args.command == 'setup':
         cmd_setup(args)
+    elif args.command == 'batch':
+        cmd_batch(args)
+    elif args.command == 'daemon':
+        cmd_daemon(args)
     else:
         parser.print_help()
 